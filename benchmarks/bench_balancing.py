@@ -0,0 +1,61 @@
+# benchmarks/bench_balancing.py
+#
+# Time and peak traced memory of each class-balancing strategy on a synthetic
+# creditcard-shaped matrix (29 features, ~0.17% fraud). Run from the
+# repository root:
+#
+#     python -m benchmarks.bench_balancing --rows 284807
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_creditcard, CREDITCARD_FEATURES
+from src.transformers import apply_balancing, balanced_sample_weights, iter_partitioned_smote
+
+
+def make_creditcard_matrix(n_rows: int, fraud_rate: float = 0.0017, seed: int = 42):
+    df = make_creditcard(n_rows, seed=seed, fraud_rate=fraud_rate)
+    X = df[CREDITCARD_FEATURES + ["Amount"]]
+    X.columns = [f"num__{col}" for col in X.columns]
+    return X, df["Class"]
+
+
+def profiled(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def _stream_rows(X, y):
+    # Consume the generator as a partial_fit loop would, keeping one chunk at a time
+    return sum(len(chunk_y) for _, chunk_y in iter_partitioned_smote(X, y)) + len(y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark class-balancing strategies.")
+    parser.add_argument("--rows", type=int, default=284_807)
+    args = parser.parse_args()
+
+    X, y = make_creditcard_matrix(args.rows)
+    print(f"rows={len(y)} fraud={int(y.sum())}  input {X.memory_usage().sum() / 2**20:.1f} MB")
+    print(f"{'strategy':<30}{'rows out':>12}{'time s':>10}{'peak MB':>10}")
+
+    runs = {
+        "smote (current)": lambda: len(apply_balancing(X, y, strategy="smote")[1]),
+        "undersample (current)": lambda: len(apply_balancing(X, y, strategy="undersample")[1]),
+        "partitioned_smote": lambda: len(apply_balancing(X, y, strategy="partitioned_smote")[1]),
+        "partitioned_smote, streamed": lambda: _stream_rows(X, y),
+        "sample weights": lambda: len(balanced_sample_weights(y)),
+    }
+    for name, run in runs.items():
+        rows, elapsed, peak = profiled(run)
+        print(f"{name:<30}{rows:>12}{elapsed:>10.2f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_clustering.py
+#
+# Compares exact KMeans (the current perform_clustering_analysis) with the
+# chunked MiniBatchKMeans mode on synthetic advanced-feature rows: wall time,
+# peak traced memory and inertia on the full data. Run from the repository root:
+#
+#     python -m benchmarks.bench_clustering --rows 1000000
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+
+from src.advanced.fraud_clustering_analysis import (
+    CLUSTER_FEATURES, _feature_matrix, _iter_frame_chunks, fit_minibatch_clustering, assign_clusters
+)
+
+
+def make_advanced_features(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    purchase_value = rng.integers(9, 155, n_rows).astype(float)
+    return pd.DataFrame({
+        "purchase_value": purchase_value,
+        "age": rng.integers(18, 77, n_rows).astype(float),
+        "time_to_purchase": rng.exponential(1200, n_rows),
+        "high_value_transaction": (purchase_value > 100).astype(int),
+        "device_transaction_count": rng.integers(1, 20, n_rows),
+    })
+
+
+def profiled(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact KMeans against chunked MiniBatchKMeans.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = make_advanced_features(args.rows)
+    X_full = _feature_matrix(df, CLUSTER_FEATURES, dtype=np.float64)
+
+    exact, exact_s, exact_mb = profiled(
+        lambda: KMeans(n_clusters=args.clusters, random_state=42).fit(X_full)
+    )
+    bundle, mini_s, mini_mb = profiled(
+        lambda: fit_minibatch_clustering(_iter_frame_chunks(df, args.chunk_size), args.clusters)
+    )
+    _, assign_s, _ = profiled(lambda: assign_clusters(df, bundle))
+
+    exact_inertia = -exact.score(X_full)
+    mini_inertia = -bundle["model"].score(X_full.astype(np.float32))
+    print(f"rows={args.rows} clusters={args.clusters}")
+    print(f"{'mode':<22}{'fit s':>10}{'peak MB':>10}{'inertia':>16}")
+    print(f"{'exact KMeans':<22}{exact_s:>10.2f}{exact_mb:>10.1f}{exact_inertia:>16.4g}")
+    print(f"{'minibatch (float32)':<22}{mini_s:>10.2f}{mini_mb:>10.1f}{mini_inertia:>16.4g}")
+    print(f"inertia ratio minibatch/exact: {mini_inertia / exact_inertia:.3f}")
+    print(f"assign without refit: {assign_s:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_compiled_forest.py
+#
+# Compares Random Forest inference through sklearn predict_proba, the per-tree
+# loop used by FraudScorer and the flattened CompiledForest, across batch sizes,
+# and the load time of the pickled model against the memory-mapped arrays.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_compiled_forest --train-rows 50000 --max-depth 0
+
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.bench_scoring import make_fraud_features, NUMERIC_COLS, CATEGORICAL_COLS
+from src.compiled_forest import CompiledForest
+from src.transformers import get_preprocessor, fit_transform_to_df, transform_to_df
+
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+
+
+def per_tree_proba(model, X):
+    proba = model.estimators_[0].predict_proba(X, check_input=False)
+    for tree in model.estimators_[1:]:
+        proba += tree.predict_proba(X, check_input=False)
+    return proba / len(model.estimators_)
+
+
+def time_per_call(fn, X, budget_s=1.0, min_calls=3) -> float:
+    calls, start = 0, time.perf_counter()
+    while calls < min_calls or time.perf_counter() - start < budget_s:
+        fn(X)
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled Random Forest inference.")
+    parser.add_argument("--train-rows", type=int, default=50_000)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=0, help="0 for unlimited, as train_random_forest")
+    parser.add_argument("--max-batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = make_fraud_features(args.train_rows)
+    preprocessor = get_preprocessor(NUMERIC_COLS, CATEGORICAL_COLS)
+    X_train = fit_transform_to_df(preprocessor, df[NUMERIC_COLS + CATEGORICAL_COLS])
+    feature_names = list(X_train.columns)
+    X_train = X_train.to_numpy(dtype=np.float32)
+    model = RandomForestClassifier(n_estimators=args.n_estimators, max_depth=args.max_depth or None,
+                                   random_state=42).fit(X_train, df["class"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path, forest_dir = os.path.join(tmp, "rf.pkl"), os.path.join(tmp, "rf_compiled")
+        joblib.dump(model, pickle_path)
+        start = time.perf_counter()
+        forest = CompiledForest.from_sklearn(model)
+        export_s = time.perf_counter() - start
+        forest.save(forest_dir)
+
+        start = time.perf_counter()
+        joblib.load(pickle_path)
+        pickle_load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        forest = CompiledForest.load(forest_dir)
+        compiled_load_s = time.perf_counter() - start
+        compiled_mb = sum(os.path.getsize(os.path.join(forest_dir, f)) for f in os.listdir(forest_dir)) / 1e6
+        print(f"export {export_s:.3f}s | load: pickle {pickle_load_s * 1000:8.1f} ms "
+              f"({os.path.getsize(pickle_path) / 1e6:.1f} MB), compiled mmap {compiled_load_s * 1000:6.2f} ms "
+              f"({compiled_mb:.1f} MB)")
+
+        # Scoring data goes through the preprocessor fitted on the training rows
+        X_test = transform_to_df(preprocessor, make_fraud_features(args.max_batch, seed=7)[
+            NUMERIC_COLS + CATEGORICAL_COLS], selected_features=feature_names).to_numpy(dtype=np.float32)
+        max_diff = np.abs(forest.predict_proba(X_test[:10_000]) - model.predict_proba(X_test[:10_000])).max()
+        print(f"max |compiled - sklearn| probability: {max_diff:.2e}")
+
+        print(f"{'batch':>7} {'sklearn ms':>11} {'per-tree ms':>12} {'compiled ms':>12} {'compiled tx/s':>14}")
+        for batch in [b for b in BATCH_SIZES if b <= args.max_batch]:
+            X = X_test[:batch]
+            sk = time_per_call(model.predict_proba, X)
+            loop = time_per_call(lambda x: per_tree_proba(model, x), X)
+            compiled = time_per_call(forest.predict_proba, X)
+            print(f"{batch:>7} {sk * 1000:11.3f} {loop * 1000:12.3f} {compiled * 1000:12.3f} {batch / compiled:14.0f}")
+
+
+if __name__ == "__main__":
+    main()
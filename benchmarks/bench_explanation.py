@@ -0,0 +1,60 @@
+# benchmarks/bench_explanation.py
+#
+# Explanations per second for the notebook path (shap.Explainer over the whole
+# test set), FraudExplainer single-transaction lookups (cold and cached) and
+# chunked batches. Run from the repository root:
+#
+#     python -m benchmarks.bench_explanation --rows 2000
+
+import argparse
+import time
+
+import shap
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.bench_scoring import make_fraud_features, NUMERIC_COLS, CATEGORICAL_COLS
+from src.explanation import FraudExplainer
+from src.transformers import get_preprocessor, fit_transform_to_df
+
+
+def rate(n, seconds):
+    return f"{n / seconds:10.1f} explanations/s  ({seconds:.2f} s for {n})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SHAP explanation throughput.")
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--single", type=int, default=200)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    df = make_fraud_features(args.train_rows)
+    preprocessor = get_preprocessor(NUMERIC_COLS, CATEGORICAL_COLS)
+    X_train = fit_transform_to_df(preprocessor, df[NUMERIC_COLS + CATEGORICAL_COLS])
+    model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42).fit(X_train.to_numpy(), df["class"])
+    X_test = X_train.to_numpy()[:args.rows]
+
+    start = time.perf_counter()
+    shap.Explainer(model, X_test)(X_test, check_additivity=False)
+    print(f"notebook path (shap.Explainer):   {rate(len(X_test), time.perf_counter() - start)}")
+
+    explainer = FraudExplainer(model, X_train.columns, n_jobs=args.n_jobs)
+    start = time.perf_counter()
+    for row in X_test[:args.single]:
+        explainer.explain(row)
+    print(f"single transaction, cold:         {rate(args.single, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    for row in X_test[:args.single]:
+        explainer.reason_codes(row)
+    print(f"single transaction, cached:       {rate(args.single, time.perf_counter() - start)}")
+
+    explainer.clear_cache()
+    start = time.perf_counter()
+    explainer.explain(X_test)
+    print(f"batch, chunked (n_jobs={args.n_jobs}):       {rate(len(X_test), time.perf_counter() - start)}")
+
+
+if __name__ == "__main__":
+    main()
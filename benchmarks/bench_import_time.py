@@ -0,0 +1,84 @@
+# benchmarks/bench_import_time.py
+#
+# Import time of every module in src, src.modeling and src.advanced, each
+# imported in a fresh interpreter, and which heavy optional dependencies the
+# import pulled in. Run from the repository root:
+#
+#     python -m benchmarks.bench_import_time --repeat 5 --output import_times.json
+#
+# With --max-seconds, exits with status 1 if any module takes longer to import,
+# so CI can track the import surface.
+
+import argparse
+import json
+import pkgutil
+import subprocess
+import sys
+
+PACKAGES = ["src", "src.modeling", "src.advanced"]
+HEAVY_MODULES = ["matplotlib", "seaborn", "imblearn", "shap", "sklearn", "scipy", "pyarrow"]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def package_modules(packages=PACKAGES) -> list:
+    modules = []
+    for package in packages:
+        modules.append(package)
+        path = package.replace(".", "/")
+        for info in pkgutil.iter_modules([path]):
+            if not info.ispkg:
+                modules.append(f"{package}.{info.name}")
+    return modules
+
+
+def import_time(module: str, repeat: int = 3) -> dict:
+    """
+    Best-of-`repeat` seconds to import `module` in a new interpreter, plus the heavy
+    dependencies loaded by the import.
+    """
+    timings, loaded = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        elapsed, heavy = result.stdout.splitlines()[-2:]
+        timings.append(float(elapsed))
+        loaded = [name for name in heavy.split(",") if name]
+    return {"module": module, "seconds": min(timings), "loads": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the src packages.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--max-seconds", type=float, help="fail if any module imports slower than this")
+    args = parser.parse_args()
+
+    results = [import_time(module, args.repeat) for module in package_modules()]
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']:<42} failed: {result['error']}")
+        else:
+            print(f"{result['module']:<42} {result['seconds'] * 1000:8.1f} ms  {', '.join(result['loads'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.max_seconds is not None:
+        slow = [r for r in results if "error" in r or r["seconds"] > args.max_seconds]
+        if slow:
+            print(f"{len(slow)} module(s) failed or exceeded {args.max_seconds:.2f} s")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
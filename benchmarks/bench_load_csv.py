@@ -0,0 +1,82 @@
+# benchmarks/bench_load_csv.py
+#
+# Reports load time and peak memory of data_loader.load_csv with inferred
+# dtypes, with the declared schemas, from the Parquet cache and in chunked
+# mode. Each variant runs in a fresh process so peak RSS is not shared.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_load_csv --rows 300000
+
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.synthetic import make_creditcard, make_fraud_data
+from src.data_loader import load_csv, iter_csv_chunks
+
+
+def write_creditcard_csv(path: str, n_rows: int, seed: int = 42) -> None:
+    make_creditcard(n_rows, seed=seed).to_csv(path, index=False)
+
+
+def write_fraud_csv(path: str, n_rows: int, seed: int = 42) -> None:
+    make_fraud_data(n_rows, seed=seed).to_csv(path, index=False)
+
+
+def _measure(mode, path, schema, cache_dir, queue):
+    start = time.perf_counter()
+    if mode == "chunked":
+        rows, frame_bytes = 0, 0
+        for chunk in iter_csv_chunks(path, schema=schema, chunksize=50_000):
+            rows += len(chunk)
+            frame_bytes = max(frame_bytes, chunk.memory_usage(deep=True).sum())
+    else:
+        df = load_csv(path, schema=schema, cache_dir=cache_dir)
+        rows, frame_bytes = len(df), df.memory_usage(deep=True).sum()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((rows, elapsed, peak_rss, frame_bytes / 2**20))
+
+
+def measure(mode, path, schema=None, cache_dir=None):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(mode, path, schema, cache_dir, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load_csv schemas, Parquet cache and chunked reads.")
+    parser.add_argument("--rows", type=int, default=300_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        datasets = {
+            "creditcard": (os.path.join(tmp, "creditcard.csv"), write_creditcard_csv),
+            "fraud": (os.path.join(tmp, "Fraud_Data.csv"), write_fraud_csv),
+        }
+        print(f"{'dataset':<12}{'variant':<22}{'rows':>10}{'time s':>10}{'peak RSS MB':>14}{'frame MB':>11}")
+        for name, (path, writer) in datasets.items():
+            writer(path, args.rows)
+            variants = [
+                ("inferred (current)", "full", None, None),
+                ("schema", "full", name, None),
+                ("schema, cache miss", "full", name, cache_dir),
+                ("schema, cache hit", "full", name, cache_dir),
+                ("schema, chunked", "chunked", name, None),
+            ]
+            for label, mode, schema, cache in variants:
+                rows, elapsed, peak_rss, frame_mb = measure(mode, path, schema, cache)
+                print(f"{name:<12}{label:<22}{rows:>10}{elapsed:>10.2f}{peak_rss:>14.1f}{frame_mb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_merge_ip_country.py
+#
+# Compares the per-row scan that merge_ip_country used to run against the
+# searchsorted IpRangeIndex, on synthetic data shaped like Fraud_Data.csv and
+# IpAddress_to_Country.csv. Run from the repository root:
+#
+#     python -m benchmarks.bench_merge_ip_country --transactions 150000 --ranges 138000
+
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_fraud_data, make_ip_country
+from src.feature_engineering import merge_ip_country
+from src.ip_lookup import IpRangeIndex
+
+
+def legacy_merge_ip_country(fraud_df: pd.DataFrame, ip_df: pd.DataFrame) -> pd.DataFrame:
+    fraud_df = fraud_df.copy()
+    fraud_df["ip_int"] = fraud_df["ip_address"].apply(lambda x: int(x) if pd.notnull(x) else None)
+    fraud_df = fraud_df.dropna(subset=["ip_int"])
+    ip_df = ip_df.copy()
+    ip_df["lower_bound_ip_address"] = ip_df["lower_bound_ip_address"].astype(int)
+    ip_df["upper_bound_ip_address"] = ip_df["upper_bound_ip_address"].astype(int)
+    ip_df = ip_df.sort_values(by=["lower_bound_ip_address", "upper_bound_ip_address"])
+
+    def find_country(ip_val):
+        match = ip_df.loc[
+            (ip_df["lower_bound_ip_address"] <= ip_val) &
+            (ip_val <= ip_df["upper_bound_ip_address"]),
+            "country"
+        ]
+        return match.iloc[0] if not match.empty else "Unknown"
+
+    fraud_df["country"] = fraud_df["ip_int"].apply(find_country)
+    return fraud_df.drop(columns=["ip_int"])
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merge_ip_country against the legacy per-row scan.")
+    parser.add_argument("--transactions", type=int, default=150_000)
+    parser.add_argument("--ranges", type=int, default=138_000)
+    parser.add_argument("--legacy-sample", type=int, default=2_000,
+                        help="rows timed with the legacy scan; its full runtime is extrapolated")
+    args = parser.parse_args()
+
+    ip_df = make_ip_country(args.ranges)
+    fraud_df = make_fraud_data(args.transactions)[["user_id", "ip_address"]]
+
+    index, build_s = timed(IpRangeIndex.from_frame, ip_df)
+    fast, fast_s = timed(merge_ip_country, fraud_df, index)
+
+    sample = fraud_df.head(args.legacy_sample)
+    legacy, legacy_s = timed(legacy_merge_ip_country, sample, ip_df)
+    legacy_full_s = legacy_s * len(fraud_df) / max(len(sample), 1)
+
+    matches = (fast["country"].head(len(legacy)).to_numpy() == legacy["country"].to_numpy()).all()
+    print(f"transactions={len(fraud_df)} ranges={len(ip_df)}")
+    print(f"index build:         {build_s:10.3f} s")
+    print(f"indexed merge:       {fast_s:10.3f} s")
+    print(f"legacy scan (est.):  {legacy_full_s:10.3f} s  ({len(sample)} rows in {legacy_s:.3f} s)")
+    print(f"speedup:             {legacy_full_s / fast_s:10.1f} x")
+    print(f"results match:       {matches}")
+
+
+if __name__ == "__main__":
+    main()
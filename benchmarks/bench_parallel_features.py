@@ -0,0 +1,70 @@
+# benchmarks/bench_parallel_features.py
+#
+# Throughput of the partitioned feature executor against the serial feature
+# steps on synthetic Fraud_Data, for an increasing number of workers, and a
+# check that the partitioned output equals the serial result. Run from the
+# repository root on the batch host:
+#
+#     python -m benchmarks.bench_parallel_features --rows 5000000 --jobs 1 2 4 8 16 32
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_fraud_data, make_ip_country
+from src.parallel_features import run_parallel_features
+
+SORT_KEYS = ["user_id", "device_id", "purchase_time"]
+
+
+def serial_features(df, ip_df):
+    from src.feature_engineering import add_time_features, add_frequency_features, merge_ip_country
+    from src.advanced.fraud_feature_engineering import add_transaction_amount_flags, add_time_to_purchase
+
+    df = merge_ip_country(add_frequency_features(add_time_features(df)), ip_df)
+    return add_time_to_purchase(add_transaction_amount_flags(df))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel feature executor.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--no-check", action="store_true", help="skip comparing against the serial result")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    df = make_fraud_data(args.rows)
+    ip_df = make_ip_country()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "fraud_data_cleaned.parquet")
+        ip_path = os.path.join(tmp, "ip_country.csv")
+        df.to_parquet(input_path, index=False)
+        ip_df.to_csv(ip_path, index=False)
+
+        start = time.perf_counter()
+        expected = serial_features(df.copy(), ip_df)
+        serial = time.perf_counter() - start
+        print(f"{'serial':<10} {serial:8.2f} s  {args.rows / serial:12,.0f} rows/s")
+
+        base = None
+        for jobs in sorted(set(args.jobs)):
+            output_dir = os.path.join(tmp, f"features_{jobs}")
+            result = run_parallel_features(input_path, output_dir, ip_country=ip_path, jobs=jobs)
+            base = base or result["seconds"] * jobs
+            print(f"{f'jobs={jobs}':<10} {result['seconds']:8.2f} s  {args.rows / result['seconds']:12,.0f} rows/s"
+                  f"  speedup {serial / result['seconds']:5.2f}x vs serial, "
+                  f"efficiency {base / (result['seconds'] * jobs):4.0%}")
+
+            if not args.no_check:
+                actual = pd.read_parquet(output_dir)[expected.columns]
+                pd.testing.assert_frame_equal(expected.sort_values(SORT_KEYS).reset_index(drop=True),
+                                              actual.sort_values(SORT_KEYS).reset_index(drop=True),
+                                              check_dtype=False)
+
+
+if __name__ == "__main__":
+    main()
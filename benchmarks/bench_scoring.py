@@ -0,0 +1,142 @@
+# benchmarks/bench_scoring.py
+#
+# Load test for the scoring service. Fits a preprocessor and Random Forest on
+# synthetic Fraud_Data-shaped rows, then reports latency percentiles and
+# throughput for the notebook path (transform_to_df + predict_proba), the
+# in-process FraudScorer and the HTTP server under concurrent clients.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_scoring --requests 2000 --concurrency 8
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.scoring import FraudScorer
+from src.scoring_server import serve
+from src.transformers import get_preprocessor, fit_transform_to_df, transform_to_df
+
+NUMERIC_COLS = ["purchase_value", "age", "time_since_signup", "device_transaction_count",
+                "time_to_purchase", "high_value_transaction"]
+CATEGORICAL_COLS = ["source", "browser", "sex", "country"]
+
+
+def make_fraud_features(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    hours = rng.exponential(1200, n_rows)
+    purchase_value = rng.integers(9, 155, n_rows).astype(float)
+    return pd.DataFrame({
+        "purchase_value": purchase_value,
+        "age": rng.integers(18, 77, n_rows).astype(float),
+        "time_since_signup": hours,
+        "device_transaction_count": rng.integers(1, 20, n_rows).astype(float),
+        "time_to_purchase": hours,
+        "high_value_transaction": (purchase_value > 100).astype(int),
+        "source": rng.choice(["SEO", "Ads", "Direct"], n_rows),
+        "browser": rng.choice(["Chrome", "IE", "Safari", "FireFox", "Opera"], n_rows),
+        "sex": rng.choice(["M", "F"], n_rows),
+        "country": rng.choice([f"Country_{i}" for i in range(180)], n_rows),
+        "class": (rng.random(n_rows) < 0.1).astype(int),
+    })
+
+
+def percentiles(latencies_s) -> str:
+    ms = np.asarray(latencies_s) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return f"p50={p50:7.3f} ms  p95={p95:7.3f} ms  p99={p99:7.3f} ms"
+
+
+def time_calls(fn, n_calls: int) -> list:
+    latencies = []
+    for i in range(n_calls):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _http_client(port: int, bodies: list, latencies: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for body in bodies:
+        request = (f"POST /score HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+        start = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def _http_load(port: int, bodies: list, concurrency: int) -> list:
+    latencies = []
+    shards = [bodies[i::concurrency] for i in range(concurrency)]
+    await asyncio.gather(*(_http_client(port, shard, latencies) for shard in shards))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the fraud scoring service.")
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    df = make_fraud_features(args.train_rows)
+    X = df[NUMERIC_COLS + CATEGORICAL_COLS]
+    preprocessor = get_preprocessor(NUMERIC_COLS, CATEGORICAL_COLS)
+    X_trans = fit_transform_to_df(preprocessor, X)
+    model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42).fit(X_trans, df["class"])
+    feature_names = list(X_trans.columns)
+
+    requests = make_fraud_features(args.requests, seed=7)
+    raw_numeric = requests[NUMERIC_COLS].to_numpy(dtype=np.float64)
+    raw_categorical = requests[CATEGORICAL_COLS].to_numpy(dtype=object)
+
+    n_legacy = min(args.requests, 300)
+    legacy = time_calls(
+        lambda i: model.predict_proba(transform_to_df(preprocessor, requests.iloc[[i]][X.columns], feature_names))[:, 1],
+        n_legacy,
+    )
+    scorer = FraudScorer(preprocessor, model, feature_names)
+    expected = model.predict_proba(transform_to_df(preprocessor, requests[X.columns], feature_names).to_numpy())[:, 1]
+    assert np.allclose(scorer.score(raw_numeric, raw_categorical), expected)
+    single = time_calls(lambda i: scorer.score(raw_numeric[i], raw_categorical[i]), args.requests)
+
+    print(f"single transaction, {n_legacy} calls, notebook path: {percentiles(legacy)}")
+    print(f"single transaction, {args.requests} calls, FraudScorer:  {percentiles(single)}")
+    for batch in (10, 100, 1000):
+        n_batches = max(args.requests // batch, 5)
+        lat = time_calls(lambda i: scorer.score(raw_numeric[:batch], raw_categorical[:batch]), n_batches)
+        print(f"micro-batch {batch:>5}: {batch * n_batches / sum(lat):10.0f} tx/s  {percentiles(lat)}")
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    threading.Thread(target=lambda: loop.run_until_complete(serve(scorer, port=args.port, ready=ready)),
+                     daemon=True).start()
+    ready.wait(10)
+
+    records = requests[NUMERIC_COLS + CATEGORICAL_COLS].to_dict(orient="records")
+    bodies = [json.dumps({"records": [record]}).encode() for record in records]
+    start = time.perf_counter()
+    latencies = asyncio.run(_http_load(args.port, bodies, args.concurrency))
+    elapsed = time.perf_counter() - start
+    print(f"HTTP, {args.concurrency} clients: {len(latencies) / elapsed:10.0f} req/s  {percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# benchmarks/suite.py
+#
+# Times and memory-profiles the public pipeline functions on seeded synthetic
+# data at several scales, writes the results to a JSON baseline, and compares
+# a run against a saved baseline. Run from the repository root:
+#
+#     python -m benchmarks.suite run --scales 10k,100k,1m --output benchmarks/results/baseline.json
+#     python -m benchmarks.suite run --scales 10k,100k --compare benchmarks/results/baseline.json
+#     python -m benchmarks.suite compare benchmarks/results/baseline.json current.json --threshold 0.2
+#
+# Compare exits with status 1 when a case got slower or used more memory than
+# the baseline by more than the threshold.
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.synthetic import make_creditcard, make_fraud_data, make_ip_country
+from src.instrumentation import REGISTRY
+
+FRAUD_NUMERIC = ["purchase_value", "age", "time_since_signup", "user_transaction_count",
+                 "device_transaction_count", "time_to_purchase", "high_value_transaction"]
+FRAUD_CATEGORICAL = ["source", "browser", "sex", "country"]
+CREDITCARD_NUMERIC = [f"V{i}" for i in range(1, 29)] + ["Amount"]
+
+
+def parse_scale(text: str) -> int:
+    text = text.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def _fraud_features(n_rows, seed):
+    from src.feature_engineering import add_time_features, add_frequency_features, merge_ip_country
+    from src.advanced.fraud_feature_engineering import add_transaction_amount_flags, add_time_to_purchase
+
+    df = merge_ip_country(add_frequency_features(add_time_features(make_fraud_data(n_rows, seed))),
+                          make_ip_country(seed=seed))
+    return add_time_to_purchase(add_transaction_amount_flags(df))
+
+
+def _creditcard_matrix(n_rows, seed):
+    from src.transformers import get_preprocessor, fit_transform_to_df
+
+    df = make_creditcard(n_rows, seed)
+    X = fit_transform_to_df(get_preprocessor(CREDITCARD_NUMERIC, []), df[CREDITCARD_NUMERIC])
+    return X, df["Class"]
+
+
+def _case_handle_missing_values(n_rows, seed):
+    from src.preprocessing import handle_missing_values
+    df = make_fraud_data(n_rows, seed)
+    return lambda: handle_missing_values(df.copy())
+
+
+def _case_preprocess(n_rows, seed):
+    from src.preprocessing import preprocess
+    df = make_fraud_data(n_rows, seed)
+    return lambda: preprocess(df, datetime_cols=["signup_time", "purchase_time"])
+
+
+def _case_add_time_features(n_rows, seed):
+    from src.feature_engineering import add_time_features
+    df = make_fraud_data(n_rows, seed)
+    return lambda: add_time_features(df)
+
+
+def _case_add_frequency_features(n_rows, seed):
+    from src.feature_engineering import add_frequency_features
+    df = make_fraud_data(n_rows, seed)
+    return lambda: add_frequency_features(df)
+
+
+def _case_merge_ip_country(n_rows, seed):
+    from src.feature_engineering import merge_ip_country
+    df, ip_df = make_fraud_data(n_rows, seed), make_ip_country(seed=seed)
+    return lambda: merge_ip_country(df, ip_df)
+
+
+def _case_score_transaction_risk(n_rows, seed):
+    from src.advanced.fraud_risk_scoring import score_transaction_risk
+    df = _fraud_features(n_rows, seed)
+    return lambda: score_transaction_risk(df)
+
+
+def _case_clustering(n_rows, seed):
+    from src.advanced.fraud_clustering_analysis import perform_clustering_analysis
+    df = _fraud_features(n_rows, seed)
+    return lambda: perform_clustering_analysis(df, mode="minibatch")
+
+
+def _case_outliers(n_rows, seed):
+    from src.advanced.outlier_detection import detect_outliers_iforest
+    df = _fraud_features(n_rows, seed)
+    return lambda: detect_outliers_iforest(df, sample_size=200_000)
+
+
+def _case_optimize_dtypes(n_rows, seed):
+    from src.dtype_optimization import optimize_dtypes
+    df = _fraud_features(n_rows, seed)
+    return lambda: optimize_dtypes(df)
+
+
+def _case_fit_transform(n_rows, seed):
+    from src.transformers import get_preprocessor, fit_transform_to_df
+    X = _fraud_features(n_rows, seed)[FRAUD_NUMERIC + FRAUD_CATEGORICAL]
+    return lambda: fit_transform_to_df(get_preprocessor(FRAUD_NUMERIC, FRAUD_CATEGORICAL), X)
+
+
+def _case_apply_balancing(n_rows, seed):
+    from src.transformers import apply_balancing
+    X, y = _creditcard_matrix(n_rows, seed)
+    return lambda: apply_balancing(X, y, strategy="smote")
+
+
+def _case_train_logistic_regression(n_rows, seed):
+    from src.modeling.train_and_evaulate import train_logistic_regression
+    X, y = _creditcard_matrix(n_rows, seed)
+    return lambda: train_logistic_regression(X, y)
+
+
+def _case_train_random_forest(n_rows, seed):
+    from src.modeling.train_and_evaulate import train_random_forest
+    X, y = _creditcard_matrix(n_rows, seed)
+    return lambda: train_random_forest(X, y, n_jobs=-1)
+
+
+def _case_evaluate_model(n_rows, seed):
+    from src.modeling.train_and_evaulate import train_logistic_regression, evaluate_model
+    X, y = _creditcard_matrix(n_rows, seed)
+    model = train_logistic_regression(X, y)
+    return lambda: evaluate_model(model, X, y)
+
+
+# name -> (setup(n_rows, seed) returning the call to measure, largest scale it runs at)
+CASES = {
+    "handle_missing_values": (_case_handle_missing_values, 10_000_000),
+    "preprocess": (_case_preprocess, 10_000_000),
+    "add_time_features": (_case_add_time_features, 10_000_000),
+    "add_frequency_features": (_case_add_frequency_features, 10_000_000),
+    "merge_ip_country": (_case_merge_ip_country, 10_000_000),
+    "score_transaction_risk": (_case_score_transaction_risk, 10_000_000),
+    "perform_clustering_analysis": (_case_clustering, 10_000_000),
+    "detect_outliers_iforest": (_case_outliers, 10_000_000),
+    "optimize_dtypes": (_case_optimize_dtypes, 10_000_000),
+    "fit_transform_to_df": (_case_fit_transform, 10_000_000),
+    "apply_balancing": (_case_apply_balancing, 1_000_000),
+    "train_logistic_regression": (_case_train_logistic_regression, 1_000_000),
+    "train_random_forest": (_case_train_random_forest, 100_000),
+    "evaluate_model": (_case_evaluate_model, 10_000_000),
+}
+
+
+def measure(name, n_rows, seed=42, repeat=3) -> dict:
+    """
+    Best-of-`repeat` wall time with instrumentation off, then one run under tracemalloc
+    for the peak traced allocation. Each run gets a freshly set-up input.
+    """
+    setup, _ = CASES[name]
+    timings = []
+    # evaluate_model and friends print reports; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            call = setup(n_rows, seed)
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+
+        call = setup(n_rows, seed)
+        REGISTRY.reset()
+        REGISTRY.enable(trace_memory=True)
+        try:
+            with REGISTRY.stage(name, rows=n_rows):
+                call()
+        finally:
+            REGISTRY.disable()
+    record = REGISTRY.records[-1]
+    seconds = min(timings)
+    return {
+        "case": name, "rows": n_rows, "seconds": seconds, "rows_per_sec": n_rows / seconds if seconds else None,
+        "traced_peak_mb": record["traced_peak_bytes"] / 2**20,
+        "peak_rss_delta_mb": (record["peak_rss_delta_bytes"] / 2**20
+                              if record["peak_rss_delta_bytes"] is not None else None),
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "numpy": np.__version__, "pandas": pd.__version__, "sklearn": sklearn.__version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(cases, scales, seed=42, repeat=3) -> dict:
+    results = {}
+    for n_rows in scales:
+        for name in cases:
+            if n_rows > CASES[name][1]:
+                print(f"{name:<28} {n_rows:>10,} skipped (above the case's largest scale)")
+                continue
+            result = measure(name, n_rows, seed=seed, repeat=repeat)
+            results[f"{name}@{n_rows}"] = result
+            print(f"{name:<28} {n_rows:>10,} {result['seconds']:9.3f} s {result['rows_per_sec']:>12,.0f} rows/s "
+                  f"{result['traced_peak_mb']:9.1f} MB traced peak")
+    return {"environment": environment(), "seed": seed, "results": results}
+
+
+def compare(baseline: dict, current: dict, threshold=0.2, min_seconds=0.01) -> list:
+    """
+    Cases present in both runs whose time or traced peak memory grew by more than
+    `threshold` (relative). Timings under `min_seconds` in the baseline are too noisy
+    to compare and only their memory is checked.
+    """
+    regressions = []
+    for key, now in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        checks = [("traced_peak_mb", before["traced_peak_mb"], now["traced_peak_mb"])]
+        if before["seconds"] >= min_seconds:
+            checks.append(("seconds", before["seconds"], now["seconds"]))
+        for metric, old, new in checks:
+            if old > 0 and (new - old) / old > threshold:
+                regressions.append({"case": key, "metric": metric, "baseline": old, "current": new,
+                                    "change": (new - old) / old})
+    return regressions
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _report(regressions, threshold) -> int:
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%}.")
+        return 0
+    for r in regressions:
+        print(f"REGRESSION {r['case']:<36} {r['metric']:<15} {r['baseline']:10.3f} -> {r['current']:10.3f} "
+              f"({r['change']:+.0%})")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the fraud detection pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--scales", default="10k,100k", help="comma-separated row counts, e.g. 10k,1m,10m")
+    run_parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", help="write the results JSON here")
+    run_parser.add_argument("--compare", help="baseline JSON to compare the results against")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.command == "compare":
+        sys.exit(_report(compare(_load(args.baseline), _load(args.current), args.threshold), args.threshold))
+
+    cases = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {sorted(unknown)}")
+    results = run(cases, [parse_scale(scale) for scale in args.scales.split(",")], seed=args.seed,
+                  repeat=args.repeat)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+    if args.compare:
+        sys.exit(_report(compare(_load(args.compare), results, args.threshold), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/synthetic.py
+#
+# Seeded generators for synthetic data with the schemas of the raw datasets:
+# Fraud_Data.csv, IpAddress_to_Country.csv and creditcard.csv. The same seed
+# and size always give the same frame, so benchmark runs are comparable.
+
+import numpy as np
+import pandas as pd
+
+SOURCES = ["SEO", "Ads", "Direct"]
+BROWSERS = ["Chrome", "IE", "Safari", "FireFox", "Opera"]
+COUNTRIES = [f"Country_{i}" for i in range(200)]
+CREDITCARD_FEATURES = [f"V{i}" for i in range(1, 29)]
+
+
+def make_ip_country(n_ranges: int = 138_000, seed: int = 42) -> pd.DataFrame:
+    """
+    IpAddress_to_Country: non-overlapping ranges with gaps between them, lower bounds
+    stored as floats like the real table.
+    """
+    rng = np.random.default_rng(seed)
+    edges = np.sort(rng.choice(2**32 - 1, size=2 * n_ranges, replace=False))
+    countries = np.asarray(COUNTRIES)
+    return pd.DataFrame({
+        "lower_bound_ip_address": edges[0::2].astype(float),
+        "upper_bound_ip_address": edges[1::2],
+        "country": countries[rng.integers(0, len(countries), n_ranges)],
+    })
+
+
+def make_fraud_data(n_rows: int, seed: int = 42, fraud_rate: float = 0.094,
+                    device_share: float = 0.9) -> pd.DataFrame:
+    """
+    Fraud_Data: one row per purchase with parsed datetimes. Users are unique per row,
+    as in the real data; about `device_share` * n_rows distinct devices are shared
+    between purchases, and a few rows miss their ip_address.
+    """
+    rng = np.random.default_rng(seed)
+    signup = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 200 * 86400, n_rows), unit="s")
+    purchase = signup + pd.to_timedelta(rng.integers(60, 100 * 86400, n_rows), unit="s")
+    devices = rng.integers(0, max(int(n_rows * device_share), 1), n_rows)
+    ip_address = rng.uniform(5e4, 2**32 - 1, n_rows)
+    ip_address[rng.random(n_rows) < 0.001] = np.nan
+    return pd.DataFrame({
+        "user_id": rng.permutation(n_rows * 2)[:n_rows],
+        "signup_time": signup,
+        "purchase_time": purchase,
+        "purchase_value": rng.integers(9, 155, n_rows),
+        "device_id": pd.Series(devices).map("D{:012d}".format),
+        "source": rng.choice(SOURCES, n_rows),
+        "browser": rng.choice(BROWSERS, n_rows),
+        "sex": rng.choice(["M", "F"], n_rows),
+        "age": rng.integers(18, 77, n_rows),
+        "ip_address": ip_address,
+        "class": (rng.random(n_rows) < fraud_rate).astype(int),
+    })
+
+
+def make_creditcard(n_rows: int, seed: int = 42, fraud_rate: float = 0.0017) -> pd.DataFrame:
+    """
+    creditcard: Time, the PCA components V1..V28, Amount and Class; fraud rows are
+    shifted so models have signal to learn.
+    """
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < fraud_rate).astype(int)
+    V = rng.standard_normal((n_rows, 28))
+    V[y == 1] += 1.5
+    df = pd.DataFrame(V, columns=CREDITCARD_FEATURES)
+    df.insert(0, "Time", np.sort(rng.uniform(0, 172_792, n_rows)).round())
+    df["Amount"] = rng.exponential(88, n_rows).round(2)
+    df["Class"] = y
+    return df
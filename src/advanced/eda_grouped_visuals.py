@@ -1,17 +1,31 @@
-import seaborn as sns
-import matplotlib.pyplot as plt
+import os
 import pandas as pd
 import logging
 
-def plot_fraud_rate_by_category(df, category_col, target_col='class', save=False):
-    top_cats = df[category_col].value_counts().head(10).index
-    df_top = df[df[category_col].isin(top_cats)]
-    prop_df = pd.crosstab(df_top[category_col], df_top[target_col], normalize='index')
+from src.utils import lazy_import
+
+sns = lazy_import("seaborn")
+plt = lazy_import("matplotlib.pyplot")
+
+def plot_fraud_rate_by_category(df, category_col, target_col='class', save=False, cube=None):
+    """
+    With a `stats_cube.FraudStatsCube`, the top categories and their fraud rates are
+    read from the cube instead of recomputed from `df` (which may then be None).
+    """
+    if cube is not None:
+        stats = cube.query(category_col).nlargest(10, "count").sort_index()
+        prop_df = pd.DataFrame({0: 1 - stats["fraud_rate"], 1: stats["fraud_rate"]})
+        prop_df.columns.name = target_col
+    else:
+        top_cats = df[category_col].value_counts().head(10).index
+        df_top = df[df[category_col].isin(top_cats)]
+        prop_df = pd.crosstab(df_top[category_col], df_top[target_col], normalize='index')
     prop_df.plot(kind='bar', stacked=True, colormap='coolwarm', figsize=(10,5))
     plt.title(f'Fraud Rate by Top {category_col}')
     plt.ylabel('Proportion')
     plt.xticks(rotation=45)
     plt.tight_layout()
     if save:
+        os.makedirs("../reports/figures/eda", exist_ok=True)
         plt.savefig(f"../reports/figures/eda/fraud_rate_{category_col}.png")
     plt.close()
@@ -1,28 +1,109 @@
 # src/advanced/fraud_clustering_analysis.py
 
+import time
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+import joblib
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from src.instrumentation import instrument
 
-def perform_clustering_analysis(df: pd.DataFrame, n_clusters: int = 5) -> pd.DataFrame:
-    features = ['purchase_value', 'age', 'time_to_purchase', 'high_value_transaction', 'device_transaction_count']
-    features = [f for f in features if f in df.columns]
+logger = logging.getLogger(__name__)
+
+CLUSTER_FEATURES = ['purchase_value', 'age', 'time_to_purchase', 'high_value_transaction', 'device_transaction_count']
+
+
+def _feature_matrix(df: pd.DataFrame, features: list, dtype=np.float32) -> np.ndarray:
+    X = np.empty((len(df), len(features)), dtype=dtype)
+    for j, feature in enumerate(features):
+        X[:, j] = df[feature].to_numpy(dtype=dtype, na_value=0)
+    return X
+
+
+def _iter_frame_chunks(df: pd.DataFrame, chunk_size: int):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def fit_minibatch_clustering(chunks, n_clusters: int = 5, batch_size: int = 4096, features: list = None) -> dict:
+    """
+    Fits MiniBatchKMeans with partial_fit over an iterable of DataFrame chunks (for example
+    `data_loader.iter_csv_chunks`), so the full feature matrix is never held in memory.
+    Returns a model bundle for `assign_clusters` / `save_clustering_model`.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=42, n_init=3)
+    rows = 0
+    for chunk in chunks:
+        if features is None:
+            features = [f for f in CLUSTER_FEATURES if f in chunk.columns]
+        X = _feature_matrix(chunk, features)
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            # The first call initialises the centres and needs at least n_clusters rows
+            if len(batch) >= n_clusters or hasattr(kmeans, "cluster_centers_"):
+                kmeans.partial_fit(batch)
+        rows += len(X)
+    logger.info(f"Fitted MiniBatchKMeans with {n_clusters} clusters on {rows} rows.")
+    return {"model": kmeans, "features": features}
+
+
+def assign_clusters(df: pd.DataFrame, bundle: dict) -> pd.DataFrame:
+    """
+    Adds the 'cluster' column using a fitted model bundle, without refitting.
+    """
+    model, features = bundle["model"], bundle["features"]
+    dtype = model.cluster_centers_.dtype
+    df['cluster'] = model.predict(_feature_matrix(df, features, dtype=dtype))
+    return df
+
+
+def save_clustering_model(bundle: dict, path: str = "../models/cluster_model.pkl"):
+    joblib.dump(bundle, path)
+    logger.info(f"Saved clustering model to {path}")
+
+
+def load_clustering_model(path: str = "../models/cluster_model.pkl") -> dict:
+    return joblib.load(path)
+
+
+@instrument()
+def perform_clustering_analysis(df: pd.DataFrame, n_clusters: int = 5, mode: str = "exact",
+                                chunk_size: int = 100_000, bundle: dict = None) -> pd.DataFrame:
+    """
+    Adds a 'cluster' column. mode='exact' fits KMeans on the whole float64 matrix as
+    before; mode='minibatch' streams float32 chunks through MiniBatchKMeans. With a
+    fitted `bundle`, clusters are assigned without fitting.
+    """
+    if mode not in ("exact", "minibatch"):
+        raise ValueError("mode must be 'exact' or 'minibatch'")
+    features = [f for f in CLUSTER_FEATURES if f in df.columns]
 
     if not features:
-        logging.warning("No valid features found for clustering.")
+        logger.warning("No valid features found for clustering.")
         df['cluster'] = -1
         return df
 
     try:
-        X = df[features].fillna(0)
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        df['cluster'] = kmeans.fit_predict(X)
-        logging.info(f"Added 'cluster' column with {n_clusters} clusters.")
+        start = time.perf_counter()
+        if bundle is not None:
+            assign_clusters(df, bundle)
+            logger.info(f"Assigned clusters with a fitted model in {time.perf_counter() - start:.2f}s.")
+            return df
+        if mode == "minibatch":
+            bundle = fit_minibatch_clustering(_iter_frame_chunks(df, chunk_size), n_clusters, features=features)
+            assign_clusters(df, bundle)
+        else:
+            from sklearn.cluster import KMeans
+
+            X = df[features].fillna(0)
+            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+            df['cluster'] = kmeans.fit_predict(X)
+        logger.info(f"Added 'cluster' column with {n_clusters} clusters ({mode}) "
+                    f"in {time.perf_counter() - start:.2f}s.")
     except Exception as e:
-        logging.warning(f"Clustering failed: {e}")
+        logger.warning(f"Clustering failed: {e}")
         df['cluster'] = -1
 
     return df
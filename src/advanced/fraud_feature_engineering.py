@@ -1,26 +1,34 @@
 import pandas as pd
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from src.time_features import compute_time_features
+from src.instrumentation import instrument
 
+logger = logging.getLogger(__name__)
+
+@instrument()
 def add_transaction_amount_flags(df: pd.DataFrame, threshold: float = 100) -> pd.DataFrame:
     try:
-        df = df.copy()
-        df["high_value_transaction"] = (df["purchase_value"] > threshold).astype(int)
-        logging.info(f"Added high_value_transaction with threshold {threshold}.")
+        df["high_value_transaction"] = (df["purchase_value"].to_numpy() > threshold).astype(int)
+        logger.info(f"Added high_value_transaction with threshold {threshold}.")
     except Exception as e:
-        logging.warning(f"Failed to add high_value_transaction: {e}")
+        logger.warning(f"Failed to add high_value_transaction: {e}")
     return df
 
+@instrument()
 def add_time_to_purchase(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds time_to_purchase (hours from signup to purchase) in place. It is the same delta
+    as time_since_signup, so that column is reused when add_time_features already ran.
+    """
     try:
-        df = df.copy()
-        df["signup_time"] = pd.to_datetime(df["signup_time"])
-        df["purchase_time"] = pd.to_datetime(df["purchase_time"])
-        df["time_to_purchase"] = (df["purchase_time"] - df["signup_time"]).dt.total_seconds() / 3600  # hours
-        logging.info("Added time_to_purchase feature.")
+        if "time_since_signup" in df.columns:
+            df["time_to_purchase"] = df["time_since_signup"]
+        else:
+            df["time_to_purchase"] = compute_time_features(df, velocity_keys=())["time_since_signup"]
+        logger.info("Added time_to_purchase feature.")
     except Exception as e:
-        logging.warning(f"Failed to add time_to_purchase: {e}")
+        logger.warning(f"Failed to add time_to_purchase: {e}")
     return df
 
 def save_advanced_featured_data(df: pd.DataFrame, filename="fraud_data_advanced_features.parquet", output_dir="../data/processed/"):
@@ -28,4 +36,4 @@ def save_advanced_featured_data(df: pd.DataFrame, filename="fraud_data_advanced_
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, filename)
     df.to_parquet(output_path, index=False)
-    logging.info(f"Saved advanced feature-engineered data to {output_path}")
+    logger.info(f"Saved advanced feature-engineered data to {output_path}")
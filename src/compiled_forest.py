@@ -0,0 +1,185 @@
+# src/compiled_forest.py
+
+import argparse
+import logging
+import os
+
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledForest:
+    """
+    A fitted tree ensemble (RandomForestClassifier / ExtraTreesClassifier) flattened
+    into contiguous node arrays: split feature (int32), threshold (float32), left and
+    right child (int32), missing-value direction and per-node class probabilities
+    (float32), with every tree's nodes concatenated and `roots` marking where each
+    tree starts. Leaves point to themselves.
+
+    Scoring walks all (row, tree) pairs one level at a time with array gathers,
+    dropping pairs as they reach a leaf, so a call costs a few dozen NumPy operations
+    instead of one predict_proba per tree. The arrays save to a directory of .npy
+    files that load, memory-mapped, far faster than unpickling the forest.
+    """
+
+    _ARRAYS = ("feature", "threshold", "left", "right", "missing_left", "value", "roots", "classes")
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self._children_table = None
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left < 0
+
+            threshold = tree.threshold.astype(np.float32)
+            # Trees compare float32 inputs against float64 thresholds; rounding the
+            # threshold down to a float32 keeps every comparison identical
+            rounded_up = threshold > tree.threshold
+            threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+            value = tree.value[:, 0, :]
+            value = value / np.maximum(value.sum(axis=1, keepdims=True), np.finfo(np.float64).tiny)
+
+            missing_go_to_left = getattr(tree, "missing_go_to_left", None)
+            if missing_go_to_left is None:
+                missing_go_to_left = np.zeros(tree.node_count, dtype=np.uint8)
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset)
+            missing.append(np.asarray(missing_go_to_left, dtype=bool))
+            values.append(value.astype(np.float32))
+            roots.append(offset)
+            offset += tree.node_count
+
+        forest = cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            missing_left=np.concatenate(missing),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+        )
+        logger.info(f"Compiled forest with {len(forest.roots)} trees and {offset} nodes.")
+        return forest
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def _children(self) -> np.ndarray:
+        # (n_nodes, 2) [left, right] so one gather picks the branch taken
+        if self._children_table is None:
+            self._children_table = np.stack([self.left, self.right], axis=1)
+        return self._children_table
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Global leaf index reached in every tree, shape (n_rows, n_estimators).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        check_missing = np.isnan(X).any()
+        children = self._children()
+        flat_X = X.ravel()
+
+        # Tree-major order keeps consecutive pairs inside one tree's nodes. Only the
+        # pairs still at split nodes are carried from level to level.
+        leaves = np.repeat(self.roots, n_rows)
+        pair = np.arange(n_rows * n_trees)
+        row_offset = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        current = leaves.copy()
+        split = self.left[current] != current
+        pair, current, row_offset = pair[split], current[split], row_offset[split]
+        while len(pair):
+            x = flat_X[row_offset + self.feature[current]]
+            go_right = ~(x <= self.threshold[current])
+            if check_missing:
+                go_right &= ~(np.isnan(x) & self.missing_left[current])
+            current = children[current, go_right.view(np.int8)]
+            split = self.left[current] != current
+            if not split.all():
+                leaves[pair[~split]] = current[~split]
+                pair, current, row_offset = pair[split], current[split], row_offset[split]
+        return leaves.reshape(n_trees, n_rows).T
+
+    def predict_proba(self, X, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Mean of the trees' leaf class probabilities, as RandomForestClassifier.predict_proba.
+        Rows are processed `chunk_size` at a time to bound the (rows x trees) work arrays.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        proba = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            proba[start:start + len(leaves)] = self.value[leaves].sum(axis=1, dtype=np.float64)
+        return proba / len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, forest_dir: str) -> None:
+        os.makedirs(forest_dir, exist_ok=True)
+        for name in self._ARRAYS:
+            array = self.classes_ if name == "classes" else getattr(self, name)
+            np.save(os.path.join(forest_dir, f"{name}.npy"), array)
+        logger.info(f"Saved compiled forest to {forest_dir}")
+
+    @classmethod
+    def load(cls, forest_dir: str, mmap: bool = True) -> "CompiledForest":
+        """
+        Loads a forest written by `save`. With `mmap=True` the node arrays are
+        memory-mapped read-only and shared between processes through the page cache.
+        """
+        mmap_mode = "r" if mmap else None
+        # Plain ndarray views of the maps avoid np.memmap's per-operation overhead
+        arrays = {
+            name: np.asarray(np.load(os.path.join(forest_dir, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in cls._ARRAYS
+        }
+        return cls(**arrays)
+
+
+def export_forest(model_path: str, forest_dir: str) -> CompiledForest:
+    """
+    Compiles a pickled forest, e.g. ../models/rf_fraud_model.pkl, into `forest_dir`.
+    """
+    forest = CompiledForest.from_sklearn(joblib.load(model_path))
+    forest.save(forest_dir)
+    return forest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a pickled Random Forest to compiled node arrays.")
+    parser.add_argument("model_path")
+    parser.add_argument("forest_dir")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    export_forest(args.model_path, args.forest_dir)
+
+
+if __name__ == "__main__":
+    main()
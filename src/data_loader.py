@@ -1,17 +1,127 @@
 import pandas as pd
+import hashlib
+import logging
 import os
 
-def load_csv(file_path):
-    
+logger = logging.getLogger(__name__)
+
+# Declared read schemas for the raw datasets. Numeric features are read as
+# float32, low-cardinality strings as category and timestamps are parsed by
+# the CSV reader instead of afterwards.
+SCHEMAS = {
+    "fraud": {
+        "dtype": {
+            "user_id": "int64",
+            "purchase_value": "float32",
+            "device_id": "category",
+            "source": "category",
+            "browser": "category",
+            "sex": "category",
+            "age": "float32",
+            # IPv4 addresses need more precision than float32 offers
+            "ip_address": "float64",
+            "class": "int8",
+        },
+        "parse_dates": ["signup_time", "purchase_time"],
+    },
+    "creditcard": {
+        "dtype": {
+            "Time": "float32",
+            **{f"V{i}": "float32" for i in range(1, 29)},
+            "Amount": "float32",
+            "Class": "int8",
+        },
+        "parse_dates": [],
+    },
+    "ip_country": {
+        "dtype": {
+            "lower_bound_ip_address": "float64",
+            "upper_bound_ip_address": "int64",
+            "country": "category",
+        },
+        "parse_dates": [],
+    },
+}
+
+
+def _read_csv_kwargs(schema):
+    if schema is None:
+        return {}
+    if isinstance(schema, str):
+        if schema not in SCHEMAS:
+            raise ValueError(f"Unknown schema '{schema}'. Expected one of {list(SCHEMAS)}")
+        schema = SCHEMAS[schema]
+    kwargs = {"dtype": schema.get("dtype")}
+    if schema.get("parse_dates"):
+        kwargs["parse_dates"] = schema["parse_dates"]
+    return kwargs
+
+
+def file_fingerprint(file_path, block_size=1 << 20):
+    """
+    Returns a SHA-256 hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(file_path, schema, cache_dir):
+    key = hashlib.sha256()
+    key.update(file_fingerprint(file_path).encode())
+    key.update(repr(sorted(_read_csv_kwargs(schema).items())).encode())
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{key.hexdigest()[:16]}.parquet")
+
+
+def load_csv(file_path, schema=None, cache_dir=None):
+    """
+    Loads a CSV file into a DataFrame.
+
+    `schema` is a key of SCHEMAS (or a dict with `dtype`/`parse_dates`) applied at
+    read time. With `cache_dir`, the parsed frame is stored as Parquet keyed by the
+    file contents and schema, and later loads of unchanged files read that instead.
+    """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
+    cache_path = _cache_path(file_path, schema, cache_dir) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        logger.info(f"Loading {file_path} from cache {cache_path}")
+        return pd.read_parquet(cache_path)
+
     try:
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, **_read_csv_kwargs(schema))
         if df.empty:
             raise pd.errors.EmptyDataError(f"File is empty: {file_path}")
-        return df
     except pd.errors.ParserError as e:
         raise ValueError(f"Parsing error in file: {file_path}\n{e}")
     except Exception as e:
         raise Exception(f"Error loading file: {file_path}\n{e}")
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            df.to_parquet(cache_path, index=False)
+            logger.info(f"Cached {file_path} to {cache_path}")
+        except ImportError as e:
+            logger.warning(f"Parquet cache disabled, no engine available: {e}")
+    return df
+
+
+def iter_csv_chunks(file_path, schema=None, chunksize=100_000):
+    """
+    Yields the CSV in DataFrame chunks of `chunksize` rows, for files larger than memory.
+    Category columns are encoded per chunk, so their categories can differ between chunks.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    try:
+        with pd.read_csv(file_path, chunksize=chunksize, **_read_csv_kwargs(schema)) as reader:
+            for chunk in reader:
+                yield chunk
+    except pd.errors.ParserError as e:
+        raise ValueError(f"Parsing error in file: {file_path}\n{e}")
@@ -0,0 +1,243 @@
+# src/dtype_optimization.py
+
+import logging
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+IP_COLS = ("ip_address",)
+# String columns with more distinct values than this (device_id, ...) are identifiers:
+# they are dictionary-encoded per frame instead of getting a fixed vocabulary
+MAX_VOCABULARY = 1000
+UINT32_MAX = np.iinfo(np.uint32).max
+
+
+def _is_string(series: pd.Series) -> bool:
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Unordered categories read with a schema depend on the frame they came from, so
+        # they get a vocabulary like plain strings; ordered ones (risk_score_label) are
+        # already fixed by the code that builds them
+        if dtype.ordered:
+            return False
+        dtype = dtype.categories.dtype
+    return pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+
+def _integer_dtype(low, high, unsigned: bool = False):
+    # Smallest dtype holding [low, high]. Unsigned types only on request: arithmetic on
+    # them wraps around, e.g. `df["class"] - 1` gives 255 for class 0
+    if unsigned and low >= 0:
+        candidates = (np.uint8, np.uint16, np.uint32, np.uint64)
+    else:
+        candidates = (np.int8, np.int16, np.int32, np.int64)
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return None
+
+
+def fit_numeric_dtype(series: pd.Series, allow_float32: bool = False, unsigned: bool = False):
+    """
+    Compact dtype for a numeric column, or None to leave it as is: the smallest signed
+    integer dtype holding every value (unsigned when `unsigned` and none is negative),
+    or float32 for floats when the values survive the cast exactly or `allow_float32`.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or not isinstance(dtype, np.dtype):
+        return None
+    if pd.api.types.is_integer_dtype(dtype):
+        if len(series) == 0:
+            return None
+        return _integer_dtype(series.min(), series.max(), unsigned=unsigned)
+    if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+        values = series.to_numpy()
+        if allow_float32 or np.array_equal(values.astype(np.float32).astype(dtype), values, equal_nan=True):
+            return np.dtype(np.float32)
+    return None
+
+
+@instrument()
+def fit_dtype_plan(df: pd.DataFrame, max_vocabulary: int = MAX_VOCABULARY, ip_cols=IP_COLS,
+                   float32_cols=(), unsigned_cols=()) -> dict:
+    """
+    Decides the compact representation of a frame: a sorted vocabulary for every string
+    column (or unordered categorical of strings) with at most `max_vocabulary` distinct
+    values, so its category codes are the same wherever the plan is applied; per-frame
+    dictionary encoding for the other string columns; nullable UInt32 for `ip_cols`; and
+    a fixed dtype for every other numeric column, from `fit_numeric_dtype` on this frame. Integers are signed unless listed in
+    `unsigned_cols`; floats become float32 where that is exact here, or for
+    `float32_cols` even where it rounds.
+    """
+    categories, dictionary_cols, numeric_dtypes = {}, [], {}
+    for col in df.columns:
+        if col in ip_cols:
+            continue
+        if _is_string(df[col]):
+            uniques = df[col].dropna().unique()
+            if len(uniques) <= max_vocabulary:
+                categories[col] = sorted(str(value) for value in uniques)
+            else:
+                dictionary_cols.append(col)
+            continue
+        dtype = fit_numeric_dtype(df[col], allow_float32=col in float32_cols, unsigned=col in unsigned_cols)
+        if dtype is not None:
+            numeric_dtypes[col] = dtype.name
+    return {
+        "categories": categories,
+        "dictionary_cols": dictionary_cols,
+        "ip_cols": [col for col in ip_cols if col in df.columns],
+        "float32_cols": [col for col in float32_cols if col in df.columns],
+        "numeric_dtypes": numeric_dtypes,
+    }
+
+
+def cast_numeric(series: pd.Series, dtype) -> pd.Series:
+    """
+    `series` as the planned `dtype`. Floats are cast even where float32 rounds, so every
+    frame gets the planned schema; for integer dtypes, missing, fractional or
+    out-of-range values raise ValueError rather than being wrapped or truncated.
+    """
+    dtype = np.dtype(dtype)
+    if series.dtype == dtype:
+        return series
+    if dtype.kind == "f":
+        return series.astype(dtype)
+    if series.isna().any():
+        raise ValueError(f"'{series.name}' has missing values; its planned dtype is {dtype}.")
+    values = series.to_numpy()
+    if not pd.api.types.is_integer_dtype(values.dtype) and not np.array_equal(np.trunc(values), values):
+        raise ValueError(f"'{series.name}' has fractional values; its planned dtype is {dtype}.")
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"'{series.name}' has values outside its planned {dtype} range "
+                         f"[{info.min}, {info.max}]; refit the dtype plan.")
+    return pd.Series(values.astype(dtype), index=series.index, name=series.name)
+
+
+def ip_to_uint32(series: pd.Series) -> pd.Series:
+    """
+    IPv4 addresses as the nullable UInt32 dtype, truncating float addresses like
+    `merge_ip_country` does. The dtype is the same whether or not addresses are
+    missing; values outside the IPv4 range leave the column unchanged.
+    """
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    missing = np.isnan(values)
+    present = np.trunc(values[~missing])
+    if len(present) and (present.min() < 0 or present.max() > UINT32_MAX):
+        logger.warning(f"'{series.name}' has values outside the IPv4 range; left as {series.dtype}.")
+        return series
+    ips = np.zeros(len(values), dtype=np.uint32)
+    ips[~missing] = present.astype(np.uint32)
+    return pd.Series(pd.arrays.IntegerArray(ips, missing), index=series.index, name=series.name)
+
+
+@instrument()
+def apply_dtype_plan(df: pd.DataFrame, plan: dict, inplace: bool = False) -> pd.DataFrame:
+    """
+    Converts `df` to the representation chosen by `fit_dtype_plan`. Values outside a
+    column's vocabulary become missing and are counted in a warning; numeric columns are
+    cast to the dtype recorded in the plan with `cast_numeric`, so every frame it is
+    applied to has the same schema.
+    """
+    if not inplace:
+        df = df.copy()
+    for col, vocabulary in plan["categories"].items():
+        if col not in df.columns:
+            continue
+        encoded = pd.Categorical(df[col], categories=vocabulary)
+        unseen = int((encoded.codes < 0).sum() - df[col].isna().sum())
+        if unseen:
+            logger.warning(f"{unseen} values of '{col}' are not in its vocabulary and were set to missing.")
+        df[col] = encoded
+    for col in plan["dictionary_cols"]:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col in plan["ip_cols"]:
+        if col in df.columns:
+            df[col] = ip_to_uint32(df[col])
+
+    for col, dtype in plan["numeric_dtypes"].items():
+        if col in df.columns:
+            df[col] = cast_numeric(df[col], dtype)
+    return df
+
+
+def column_memory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dtype and deep memory usage in bytes of every column.
+    """
+    return pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": df.memory_usage(deep=True, index=False)})
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compares two `column_memory` results: dtypes, bytes before and after, bytes saved
+    and reduction factor per column, plus a 'total' row.
+    """
+    after = after.reindex(before.index)
+    report = pd.DataFrame({
+        "dtype_before": before["dtype"],
+        "dtype_after": after["dtype"],
+        "bytes_before": before["bytes"],
+        "bytes_after": after["bytes"],
+    })
+    report.loc["total"] = ["", "", before["bytes"].sum(), after["bytes"].sum()]
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    report["reduction"] = report["bytes_before"] / report["bytes_after"].clip(lower=1)
+    return report
+
+
+@instrument()
+def optimize_dtypes(df: pd.DataFrame, plan: dict = None, inplace: bool = False, **fit_kwargs):
+    """
+    Fits a plan on `df` (unless one is given, e.g. loaded with `load_dtype_plan` at
+    scoring time) and applies it. Returns the compact frame, the plan and the
+    `memory_report`, whose totals are logged.
+    """
+    if plan is None:
+        plan = fit_dtype_plan(df, **fit_kwargs)
+    before = column_memory(df)
+    df = apply_dtype_plan(df, plan, inplace=inplace)
+    report = memory_report(before, column_memory(df))
+
+    total = report.loc["total"]
+    logger.info(f"Optimized dtypes: {total['bytes_before'] / 2**20:.1f} MB -> {total['bytes_after'] / 2**20:.1f} MB "
+                f"({total['reduction']:.1f}x smaller).")
+    return df, plan, report
+
+
+def check_parquet_roundtrip(df: pd.DataFrame, path: str = None) -> bool:
+    """
+    Writes `df` to Parquet (a temporary file unless `path` is given), reads it back and
+    checks that values, dtypes and category vocabularies are unchanged.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = path or os.path.join(tmp, "roundtrip.parquet")
+        df.to_parquet(path, index=False)
+        restored = pd.read_parquet(path)
+    try:
+        pd.testing.assert_frame_equal(df.reset_index(drop=True), restored, check_exact=True,
+                                      check_categorical=True)
+    except AssertionError as e:
+        logger.warning(f"Parquet round trip changed the frame: {e}")
+        return False
+    return True
+
+
+def save_dtype_plan(plan: dict, path="../models/dtype_plan.pkl"):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(plan, path)
+    logger.info(f"Saved dtype plan to {path}")
+
+
+def load_dtype_plan(path="../models/dtype_plan.pkl") -> dict:
+    return joblib.load(path)
@@ -1,30 +1,37 @@
+from __future__ import annotations
+
 import os
+import json
+import hashlib
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional
 
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 import pandas as pd
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.utils import lazy_import
+
+# Plotting libraries load on first use; importing this module stays cheap
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+
+logger = logging.getLogger(__name__)
 
 # Directory paths for saving figures
 UNIVARIANT_DIR = "../reports/figures/univariant"
 BIVARIANT_DIR = "../reports/figures/bivariant"
 
-os.makedirs(UNIVARIANT_DIR, exist_ok=True)
-os.makedirs(BIVARIANT_DIR, exist_ok=True)
-
 
 def save_figure(fig: plt.Figure, filename: Optional[str], folder: str) -> None:
     """
     Saves the matplotlib figure to the specified folder with given filename.
     """
     if filename:
+        os.makedirs(folder, exist_ok=True)
         path = os.path.join(folder, filename)
         fig.savefig(path, dpi=300)
-        logging.info(f"Saved figure: {path}")
+        logger.info(f"Saved figure: {path}")
 
 
 
@@ -63,8 +70,8 @@ def plot_correlation_heatmap(df, title="Feature Correlation Heatmap", save=False
     ax.set_title(title)
     fig.tight_layout()
 
-    if save and filename:
-        fig.savefig(f"../reports/figures/bivariant/{filename}", dpi=300)
+    if save:
+        save_figure(fig, filename, BIVARIANT_DIR)
 
     return fig
 
@@ -73,19 +80,19 @@ def plot_correlation_heatmap(df, title="Feature Correlation Heatmap", save=False
 def plot_amount_vs_class(df, amount_col='purchase_value', target_col='class', title="Amount vs Fraud Class", save=False, filename=None):
     fig, ax = plt.subplots(figsize=(8, 5))
     
-    # Cast x-axis to categorical explicitly if needed:
-    df[target_col] = df[target_col].astype('category')
+    # Cast x-axis to categorical on a copy of the two plotted columns, leaving df as it is
+    plot_df = df[[target_col, amount_col]].astype({target_col: 'category'})
     
     # Remove palette or adjust as per warning:
-    sns.boxplot(data=df, x=target_col, y=amount_col, ax=ax)  # Removed palette
+    sns.boxplot(data=plot_df, x=target_col, y=amount_col, ax=ax)  # Removed palette
     
     ax.set_title(title)
     ax.set_xlabel("Class (0 = Legit, 1 = Fraud)")
     ax.set_ylabel("Amount")
     fig.tight_layout()
 
-    if save and filename:
-        fig.savefig(f"../reports/figures/bivariant/{filename}", dpi=300)
+    if save:
+        save_figure(fig, filename, BIVARIANT_DIR)
 
     return fig
 
@@ -142,13 +149,11 @@ def plot_class_distribution(df: pd.DataFrame, target_col: str = 'class',
     """
     fig, ax = plt.subplots(figsize=(6, 4))
 
-    # Ensure target_col is categorical to avoid warnings
-    if not pd.api.types.is_categorical_dtype(df[target_col]):
-        df[target_col] = df[target_col].astype('category')
-        logging.info(f"Converted '{target_col}' to categorical dtype for plotting.")
+    # Plot a categorical copy of target_col to avoid warnings; df keeps its dtypes
+    plot_df = df[[target_col]].astype('category')
 
     # Use palette without hue (deprecated) --> instead use color or default
-    sns.countplot(data=df, x=target_col, color='steelblue', ax=ax)  # simpler color fix
+    sns.countplot(data=plot_df, x=target_col, color='steelblue', ax=ax)  # simpler color fix
 
     ax.set_title(title)
     ax.set_xlabel("Class (0 = Legit, 1 = Fraud)")
@@ -171,12 +176,10 @@ def plot_categorical_feature_distribution(df: pd.DataFrame, column: str,
     """
     fig, ax = plt.subplots(figsize=(8, 4))
 
-    # Convert to categorical if not already
-    if not pd.api.types.is_categorical_dtype(df[column]):
-        df[column] = df[column].astype('category')
-        logging.info(f"Converted '{column}' to categorical dtype for plotting.")
+    # Plot a categorical copy of the column; df keeps its dtypes
+    plot_df = df[[column]].astype('category')
 
-    sns.countplot(data=df, x=column, color='steelblue', ax=ax)
+    sns.countplot(data=plot_df, x=column, color='steelblue', ax=ax)
     ax.set_title(title or f"Distribution of {column}")
     plt.xticks(rotation=45)
     fig.tight_layout()
@@ -188,19 +191,22 @@ def plot_categorical_feature_distribution(df: pd.DataFrame, column: str,
 
 
 def plot_categorical_by_target(df: pd.DataFrame, column: str, target_col: str = 'class',
-                               save: bool = False) -> plt.Figure:
+                               save: bool = False, cube=None) -> plt.Figure:
     """
     Plots stacked bar chart of proportion of target variable per category level.
+    With a `stats_cube.FraudStatsCube` that has `column` as a dimension, the proportions
+    are read from the cube instead of a crosstab over `df` (which may then be None).
     """
     fig, ax = plt.subplots(figsize=(8, 4))
 
-    # Ensure both columns categorical
-    for col in [column, target_col]:
-        if not pd.api.types.is_categorical_dtype(df[col]):
-            df[col] = df[col].astype('category')
-            logging.info(f"Converted '{col}' to categorical dtype for plotting.")
-
-    prop_df = pd.crosstab(df[column], df[target_col], normalize='index')
+    if cube is not None:
+        fraud_rate = cube.query(column)["fraud_rate"]
+        prop_df = pd.DataFrame({0: 1 - fraud_rate, 1: fraud_rate})
+        prop_df.columns.name = target_col
+    else:
+        # Categorical copies of both columns; df keeps its dtypes
+        plot_df = df[[column, target_col]].astype('category')
+        prop_df = pd.crosstab(plot_df[column], plot_df[target_col], normalize='index')
     prop_df.plot(kind='bar', stacked=True, colormap="coolwarm", ax=ax)
     ax.set_title(f"Fraud Rate by {column}")
     ax.set_ylabel("Proportion")
@@ -214,3 +220,203 @@ def plot_categorical_by_target(df: pd.DataFrame, column: str, target_col: str =
 
     return fig
 
+
+
+# Batch report rendering
+#
+# The functions below pre-aggregate every figure's data with NumPy in the calling
+# process (binned histograms and KDEs, category counts, fraud-rate tables,
+# correlations), then draw the small aggregates across a process pool with
+# matplotlib's object-oriented Agg API. A manifest of input-data hashes lets
+# unchanged figures be skipped on the next run.
+
+REPORT_MANIFEST = ".eda_manifest.json"
+
+
+def _data_hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.Series, pd.DataFrame)):
+            digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def binned_histogram_kde(values, bins: int = 40, grid_size: int = 512) -> dict:
+    """
+    Histogram counts plus a Gaussian KDE (Scott's bandwidth, as seaborn uses) computed
+    by convolving a fine histogram with the kernel, so the cost is O(n + grid) rather
+    than O(n * grid). The KDE is scaled to the histogram's count axis.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    payload = {"counts": counts, "edges": edges, "kde_x": None, "kde_y": None}
+    if len(values) < 2 or values.min() == values.max():
+        return payload
+
+    fine_counts, fine_edges = np.histogram(values, bins=grid_size)
+    fine_width = fine_edges[1] - fine_edges[0]
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    if bandwidth <= 0:
+        return payload
+    sigma = bandwidth / fine_width
+    half = int(min(np.ceil(4 * sigma), grid_size))
+    offsets = np.arange(-half, half + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    # The kernel can be wider than the grid (few or few distinct values), where mode="same"
+    # would return len(kernel) points; take the grid_size points centred on the bins instead
+    smoothed = np.convolve(fine_counts, kernel, mode="full")[half:half + grid_size]
+    density = smoothed / (len(values) * fine_width)
+
+    payload["kde_x"] = (fine_edges[:-1] + fine_edges[1:]) / 2
+    payload["kde_y"] = density * len(values) * (edges[1] - edges[0])
+    return payload
+
+
+def _new_figure(figsize):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _render_histogram(payload: dict, path: str) -> str:
+    fig, ax = _new_figure((7, 4))
+    ax.stairs(payload["counts"], payload["edges"], fill=True, alpha=0.6)
+    if payload["kde_x"] is not None:
+        ax.plot(payload["kde_x"], payload["kde_y"])
+    ax.set_title(payload["title"])
+    ax.set_xlabel(payload["xlabel"])
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    fig.savefig(path, dpi=300)
+    return path
+
+
+def _render_counts(payload: dict, path: str) -> str:
+    fig, ax = _new_figure((8, 4))
+    labels = [str(label) for label in payload["labels"]]
+    ax.bar(range(len(labels)), payload["counts"], color="steelblue")
+    ax.set_xticks(range(len(labels)), labels)
+    ax.set_title(payload["title"])
+    ax.set_ylabel("Count")
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+    fig.savefig(path, dpi=300)
+    return path
+
+
+def _render_fraud_rate(payload: dict, path: str) -> str:
+    from matplotlib import colormaps
+
+    fig, ax = _new_figure((8, 4))
+    props = payload["proportions"]
+    labels = [str(label) for label in props.index]
+    colors = colormaps["coolwarm"](np.linspace(0, 1, len(props.columns)))
+    bottom = np.zeros(len(props))
+    for color, col in zip(colors, props.columns):
+        ax.bar(range(len(labels)), props[col].to_numpy(), bottom=bottom, color=color, label=str(col))
+        bottom += props[col].to_numpy()
+    ax.set_xticks(range(len(labels)), labels)
+    ax.legend(title=payload["target_col"])
+    ax.set_title(payload["title"])
+    ax.set_ylabel("Proportion")
+    ax.set_xlabel(payload["column"])
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+    fig.savefig(path, dpi=300)
+    return path
+
+
+def _render_correlation(payload: dict, path: str) -> str:
+    fig, ax = _new_figure((12, 8))
+    corr = payload["corr"]
+    image = ax.imshow(corr.to_numpy(), cmap="coolwarm", vmin=-1, vmax=1)
+    ax.set_xticks(range(len(corr.columns)), corr.columns, rotation=90)
+    ax.set_yticks(range(len(corr.index)), corr.index)
+    fig.colorbar(image, ax=ax)
+    ax.set_title(payload["title"])
+    fig.tight_layout()
+    fig.savefig(path, dpi=300)
+    return path
+
+
+def _counts_payload(series: pd.Series) -> dict:
+    counts = series.value_counts(sort=False)
+    return {"labels": list(counts.index), "counts": counts.to_numpy(), "title": f"Distribution of {series.name}"}
+
+
+def _report_jobs(df: pd.DataFrame, numeric_cols, categorical_cols, target_col):
+    # (relative path, renderer, inputs to hash, aggregate builder)
+    jobs = []
+    for col in numeric_cols:
+        jobs.append((
+            os.path.join("univariant", f"{col}_distribution.png"), _render_histogram, (df[col], "hist", 40),
+            lambda col=col: {**binned_histogram_kde(df[col].to_numpy(dtype=np.float64, na_value=np.nan)),
+                             "title": f"Distribution of {col}", "xlabel": col},
+        ))
+    for col in list(categorical_cols) + [target_col]:
+        jobs.append((
+            os.path.join("univariant", f"{col}_distribution.png"), _render_counts, (df[col], "counts"),
+            lambda col=col: _counts_payload(df[col]),
+        ))
+    for col in categorical_cols:
+        jobs.append((
+            os.path.join("bivariant", f"{col}_fraud_rate.png"), _render_fraud_rate, (df[[col, target_col]], "rate"),
+            lambda col=col: {"proportions": pd.crosstab(df[col], df[target_col], normalize="index"),
+                             "column": col, "target_col": target_col, "title": f"Fraud Rate by {col}"},
+        ))
+    numeric_df = df.select_dtypes(include=["number"])
+    jobs.append((
+        os.path.join("bivariant", "correlation_heatmap.png"), _render_correlation, (numeric_df, "corr"),
+        lambda: {"corr": numeric_df.corr(), "title": "Feature Correlation Heatmap"},
+    ))
+    return jobs
+
+
+def render_eda_report(df: pd.DataFrame, numeric_cols: List[str], categorical_cols: List[str],
+                      target_col: str = 'class', output_dir: str = "../reports/figures",
+                      n_jobs: Optional[int] = None, force: bool = False) -> dict:
+    """
+    Renders the univariate and bivariate report figures into `output_dir`.
+
+    Figures whose input data hashes to the same value as on the last run, and whose file
+    still exists, are skipped unless `force` is set. Returns {path: 'rendered' | 'skipped'}.
+    """
+    manifest_path = os.path.join(output_dir, REPORT_MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    status, tasks = {}, []
+    for rel_path, renderer, hash_inputs, build in _report_jobs(df, numeric_cols, categorical_cols, target_col):
+        path = os.path.join(output_dir, rel_path)
+        digest = _data_hash(*hash_inputs)
+        if manifest.get(rel_path) == digest and os.path.exists(path):
+            status[path] = "skipped"
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tasks.append((renderer, build(), path))
+        manifest[rel_path] = digest
+
+    if n_jobs == 1 or len(tasks) <= 1:
+        for renderer, payload, path in tasks:
+            renderer(payload, path)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for future in [pool.submit(renderer, payload, path) for renderer, payload, path in tasks]:
+                future.result()
+    for _, _, path in tasks:
+        status[path] = "rendered"
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"EDA report: {len(tasks)} figures rendered, {len(status) - len(tasks)} unchanged.")
+    return status
@@ -0,0 +1,105 @@
+# src/explanation.py
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+
+def _positive_class_shap(explainer, X: np.ndarray) -> np.ndarray:
+    values = explainer.shap_values(X, check_additivity=False)
+    # Older shap returns one array per class, newer a (n, features, classes) array
+    if isinstance(values, list):
+        return np.asarray(values[1])
+    return values[:, :, 1] if values.ndim == 3 else values
+
+
+class FraudExplainer:
+    """
+    SHAP explanations for a fitted tree model, with reason codes for flagged transactions.
+
+    The TreeExplainer is built once. Rows missing from the cache are explained in chunks,
+    across `n_jobs` processes for large batches, and every explanation is cached under the
+    row's feature bytes, so a repeat lookup of the same transaction costs a dict access.
+    The cache is LRU-bounded by `cache_size` rows.
+    """
+
+    def __init__(self, model, feature_names, cache_size=100_000, chunk_size=500, n_jobs=1):
+        self.model = model
+        self.feature_names = np.asarray([str(name) for name in feature_names])
+        import shap
+
+        self.explainer = shap.TreeExplainer(model)
+        self.cache_size = cache_size
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self._cache = OrderedDict()
+
+    def _compute(self, X: np.ndarray) -> np.ndarray:
+        chunks = [X[start:start + self.chunk_size] for start in range(0, len(X), self.chunk_size)]
+        if self.n_jobs == 1 or len(chunks) == 1:
+            parts = [_positive_class_shap(self.explainer, chunk) for chunk in chunks]
+        else:
+            parts = Parallel(n_jobs=self.n_jobs)(
+                delayed(_positive_class_shap)(self.explainer, chunk) for chunk in chunks
+            )
+        return np.vstack(parts).astype(np.float32)
+
+    def shap_values(self, X) -> np.ndarray:
+        """
+        Positive-class SHAP values, shape (n, features), served from the cache where possible.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        keys = [row.tobytes() for row in X]
+        values = np.empty(X.shape, dtype=np.float32)
+
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                self._cache.move_to_end(key)
+                values[i] = cached
+
+        if missing:
+            computed = self._compute(X[missing])
+            values[missing] = computed
+            for i, row_values in zip(missing, computed):
+                # A copy, so a cached row does not keep its whole chunk's array alive
+                self._cache[keys[i]] = row_values.copy()
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return values
+
+    def reason_codes(self, X, k=3) -> pd.DataFrame:
+        """
+        The k features pushing each transaction's fraud score up the most, with their
+        SHAP impact, as columns reason_1..reason_k and reason_1_impact..reason_k_impact.
+        """
+        values = self.shap_values(X)
+        k = min(k, values.shape[1])
+        top = np.argsort(-values, axis=1)[:, :k]
+        impacts = np.take_along_axis(values, top, axis=1)
+        reasons = {}
+        for j in range(k):
+            reasons[f"reason_{j + 1}"] = self.feature_names[top[:, j]]
+            reasons[f"reason_{j + 1}_impact"] = impacts[:, j]
+        return pd.DataFrame(reasons)
+
+    def explain(self, X, k=3) -> pd.DataFrame:
+        """
+        Fraud score plus top-k reason codes for each transaction.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        result = self.reason_codes(X, k=k)
+        result.insert(0, "score", self.model.predict_proba(X)[:, 1])
+        return result
+
+    def clear_cache(self):
+        self._cache.clear()
@@ -1,63 +1,69 @@
 # src/feature_engineering.py
 
+import numpy as np
 import pandas as pd
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from src.frequency_store import TransactionCountStore
+from src.ip_lookup import IpRangeIndex, UNKNOWN_COUNTRY
+from src.time_features import add_temporal_features
+from src.instrumentation import instrument
 
+logger = logging.getLogger(__name__)
 
-def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
+
+@instrument()
+def add_time_features(df: pd.DataFrame, velocity: bool = True) -> pd.DataFrame:
+    """
+    Adds time_since_signup (hours), hour_of_day and day_of_week and, with `velocity`,
+    user_secs_since_prev / device_secs_since_prev, in place from one pass over the
+    epoch-second arrays of the datetime columns.
+    """
     if "signup_time" in df.columns and "purchase_time" in df.columns:
-        df["time_since_signup"] = (df["purchase_time"] - df["signup_time"]).dt.total_seconds() / 3600
-        df["hour_of_day"] = df["purchase_time"].dt.hour
-        df["day_of_week"] = df["purchase_time"].dt.dayofweek
-        logging.info("Added time_since_signup, hour_of_day, and day_of_week features.")
+        add_temporal_features(df, velocity_keys=("user_id", "device_id") if velocity else ())
+        logger.info("Added time_since_signup, hour_of_day, and day_of_week features.")
     else:
-        logging.warning("Required datetime columns missing for time feature engineering.")
+        logger.warning("Required datetime columns missing for time feature engineering.")
     return df
 
 
-def add_frequency_features(df: pd.DataFrame) -> pd.DataFrame:
+@instrument()
+def add_frequency_features(df: pd.DataFrame, store: TransactionCountStore = None) -> pd.DataFrame:
+    """
+    Adds user_transaction_count and device_transaction_count. With a
+    `TransactionCountStore`, counts include every batch the store has seen and the
+    store's sliding-window counts are added too, so batches can be scored online.
+    """
+    if store is not None:
+        return store.transform(df)
     if "user_id" in df.columns:
         df["user_transaction_count"] = df.groupby("user_id")["user_id"].transform("count")
-        logging.info("Added user_transaction_count feature.")
+        logger.info("Added user_transaction_count feature.")
     if "device_id" in df.columns:
         df["device_transaction_count"] = df.groupby("device_id")["device_id"].transform("count")
-        logging.info("Added device_transaction_count feature.")
+        logger.info("Added device_transaction_count feature.")
     return df
 
 
-import logging
-
-def merge_ip_country(fraud_df: pd.DataFrame, ip_df: pd.DataFrame) -> pd.DataFrame:
+@instrument()
+def merge_ip_country(fraud_df: pd.DataFrame, ip_df) -> pd.DataFrame:
+    """
+    Adds a `country` column by locating each ip_address in the IP range table.
+    `ip_df` may be the raw range DataFrame or a prebuilt `IpRangeIndex`; pass
+    the index when merging many batches so it is only built once.
+    """
+    # Rows without an ip_address are dropped, as before
+    fraud_df = fraud_df.dropna(subset=["ip_address"]).copy()
     try:
-        # Convert fraud_df ip_address floats to integer safely
-        fraud_df = fraud_df.copy()
-        fraud_df["ip_int"] = fraud_df["ip_address"].apply(lambda x: int(x) if pd.notnull(x) else None)
-        fraud_df = fraud_df.dropna(subset=["ip_int"])
-
-        # Ensure ip_df bounds are integers
-        ip_df["lower_bound_ip_address"] = ip_df["lower_bound_ip_address"].astype(int)
-        ip_df["upper_bound_ip_address"] = ip_df["upper_bound_ip_address"].astype(int)
-        ip_df = ip_df.sort_values(by=["lower_bound_ip_address", "upper_bound_ip_address"])
-
-        def find_country(ip_val):
-            match = ip_df.loc[
-                (ip_df["lower_bound_ip_address"] <= ip_val) &
-                (ip_val <= ip_df["upper_bound_ip_address"]),
-                "country"
-            ]
-            return match.iloc[0] if not match.empty else "Unknown"
-
-        fraud_df["country"] = fraud_df["ip_int"].apply(find_country)
-
+        index = ip_df if isinstance(ip_df, IpRangeIndex) else IpRangeIndex.from_frame(ip_df)
+        # Truncate float IPs to integers, matching int(x)
+        ip_int = fraud_df["ip_address"].to_numpy(dtype=np.float64).astype(np.int64)
+        fraud_df["country"] = index.lookup(ip_int)
     except Exception as e:
-        logging.warning(f"IP merge failed: {e}")
-        fraud_df["country"] = "Unknown"
-
-    # Drop the temporary ip_int column
-    return fraud_df.drop(columns=["ip_int"])
+        logger.warning(f"IP merge failed: {e}")
+        fraud_df["country"] = UNKNOWN_COUNTRY
 
+    return fraud_df
 
 
 def save_feature_engineered_data(df: pd.DataFrame, filename="fraud_data_features.parquet", output_dir="../data/processed/"):
@@ -65,4 +71,4 @@ def save_feature_engineered_data(df: pd.DataFrame, filename="fraud_data_features
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, filename)
     df.to_parquet(output_path, index=False)
-    logging.info(f"Saved feature-engineered data to {output_path}")
+    logger.info(f"Saved feature-engineered data to {output_path}")
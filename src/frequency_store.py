@@ -0,0 +1,154 @@
+# src/frequency_store.py
+
+import logging
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Key column -> prefix of the features served for it
+KEY_PREFIXES = {"user_id": "user", "device_id": "device"}
+WINDOWS = {"1h": 3600, "24h": 86400}
+
+
+class _KeyCounts:
+    """
+    Running counts for one key column. Keys get a stable integer code on first sight;
+    totals live in an array indexed by that code, and (code, time) events inside the
+    longest window are retained for the window counts.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.totals = np.zeros(0, dtype=np.int64)
+        self.event_keys = np.zeros(0, dtype=np.int64)
+        self.event_times = np.zeros(0, dtype=np.int64)
+
+    def encode(self, values) -> np.ndarray:
+        batch_codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        unique_codes = np.empty(len(uniques), dtype=np.int64)
+        for i, key in enumerate(uniques):
+            code = self.codes.get(key)
+            if code is None:
+                code = self.codes[key] = len(self.codes)
+            unique_codes[i] = code
+        if len(self.codes) > len(self.totals):
+            grown = np.zeros(max(len(self.codes), 2 * len(self.totals)), dtype=np.int64)
+            grown[:len(self.totals)] = self.totals
+            self.totals = grown
+        return unique_codes[batch_codes]
+
+
+class TransactionCountStore:
+    """
+    Incrementally maintained user/device transaction counts.
+
+    Each `update` call folds a batch into the store in O(batch) time and returns the
+    batch's `user_transaction_count` / `device_transaction_count` (all transactions
+    seen so far, this batch included) plus counts over the trailing `windows` ending
+    at each transaction's time. Feeding a whole frame as one batch reproduces
+    `add_frequency_features`.
+
+    Window counts are exact for batches that arrive in time order. Events older than
+    the longest window before the newest time seen are pruned, so a late transaction
+    can undercount its window features. A transaction without a time counts toward the
+    totals but gets NaN window counts, and is not counted in anyone's window.
+    """
+
+    def __init__(self, key_cols=("user_id", "device_id"), time_col="purchase_time", windows=None):
+        self.key_cols = list(key_cols)
+        self.time_col = time_col
+        self.windows = dict(WINDOWS if windows is None else windows)
+        self.latest_time = None
+        self._counts = {col: _KeyCounts() for col in self.key_cols}
+
+    def _times(self, df: pd.DataFrame) -> tuple:
+        # (epoch seconds, NaT mask); NaT would otherwise read as int64 min
+        times = df[self.time_col].to_numpy(dtype="datetime64[s]")
+        return times.astype(np.int64), np.isnat(times)
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the batch to the store and returns its count features, indexed like `df`.
+        """
+        features = {}
+        times, missing = self._times(df) if self.windows else (None, None)
+        if times is not None and not missing.all():
+            batch_latest = int(times[~missing].max())
+            self.latest_time = batch_latest if self.latest_time is None else max(self.latest_time, batch_latest)
+
+        for col in self.key_cols:
+            if col not in df.columns:
+                continue
+            counts = self._counts[col]
+            prefix = KEY_PREFIXES.get(col, col)
+            codes = counts.encode(df[col])
+
+            np.add.at(counts.totals, codes, 1)
+            features[f"{prefix}_transaction_count"] = counts.totals[codes]
+
+            if self.windows:
+                for label, window_counts in self._window_counts(counts, codes, times, missing).items():
+                    features[f"{prefix}_transaction_count_{label}"] = window_counts
+
+        return pd.DataFrame(features, index=df.index)
+
+    def _window_counts(self, counts: _KeyCounts, codes: np.ndarray, times: np.ndarray, missing: np.ndarray) -> dict:
+        # Rows without a time are left out of the events and get NaN window counts
+        present = ~missing
+        keys = np.concatenate([counts.event_keys, codes[present]])
+        event_times = np.concatenate([counts.event_times, times[present]])
+        longest = max(self.windows.values())
+
+        # Pack (key, time) into one int64 spaced so that no window reaches into the
+        # previous key; after one sort, each row's window is a contiguous slice
+        # found with two binary searches
+        base = event_times.min(initial=0)
+        stride = int(event_times.max(initial=0) - base) + longest + 1
+        composite = keys * stride + (event_times - base)
+        row_composite = composite[len(counts.event_keys):]
+        composite = np.sort(composite)
+        upper = np.searchsorted(composite, row_composite, side="right")
+
+        result = {}
+        for label, seconds in self.windows.items():
+            lower = np.searchsorted(composite, row_composite - seconds, side="right")
+            if missing.any():
+                result[label] = np.full(len(codes), np.nan)
+                result[label][present] = upper - lower
+            else:
+                result[label] = upper - lower
+
+        if self.latest_time is not None:
+            recent = event_times > self.latest_time - longest
+            counts.event_keys, counts.event_times = keys[recent], event_times[recent]
+        return result
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns `df` with the count features added, updating the store with the batch.
+        """
+        features = self.update(df)
+        for col in features.columns:
+            df[col] = features[col]
+        logger.info(f"Added {len(features.columns)} incremental frequency features for {len(df)} rows.")
+        return df
+
+    def count(self, key_col: str, key) -> int:
+        counts = self._counts[key_col]
+        code = counts.codes.get(key)
+        return 0 if code is None else int(counts.totals[code])
+
+    def save(self, path: str) -> None:
+        joblib.dump(self, path)
+        logger.info(f"Saved transaction count store to {path}")
+
+    @staticmethod
+    def load(path: str, mmap_mode=None) -> "TransactionCountStore":
+        """
+        Loads a saved store. `mmap_mode='r'` memory-maps the count arrays for read-only
+        lookups; leave it unset to keep updating the loaded store.
+        """
+        return joblib.load(path, mmap_mode=mmap_mode)
@@ -0,0 +1,225 @@
+# src/instrumentation.py
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then not recorded
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def _current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _count_rows(value):
+    if hasattr(value, "shape") and len(getattr(value, "shape", ())) > 0:
+        return int(value.shape[0])
+    return None
+
+
+class StageRegistry:
+    """
+    Collects one record per instrumented stage call: wall time, rows, rows/sec,
+    RSS growth and, when enabled with trace_memory, tracemalloc allocation deltas.
+
+    Instrumentation is off until `enable()` (or FRAUD_INSTRUMENT=1 in the environment);
+    while off, instrumented functions run with a single flag check of overhead.
+    Stages named in `profile` are additionally run under cProfile and dumped to
+    `profile_dir/<stage>.prof`.
+    """
+
+    def __init__(self):
+        self.enabled = os.environ.get("FRAUD_INSTRUMENT", "") not in ("", "0")
+        self.trace_memory = False
+        self.records = []
+        self.profile = set()
+        self.profile_dir = "../reports/profiles"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self, trace_memory=False, profile=(), profile_dir=None):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        self.profile = set(profile)
+        if profile_dir:
+            self.profile_dir = profile_dir
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def disable(self):
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Times the enclosed block as stage `name`. The yielded record is a dict; set
+        record["rows"] inside the block when the row count is only known there.
+        """
+        record = {"stage": name, "rows": rows}
+        if not self.enabled:
+            yield record
+            return
+
+        stack = self._stack()
+        frame = {"record": record, "child_peak": 0}
+        if self.trace_memory:
+            traced_start, traced_peak = tracemalloc.get_traced_memory()
+            # Nested stages reset the peak; carry the enclosing stage's peak so far
+            if stack:
+                stack[-1]["child_peak"] = max(stack[-1]["child_peak"], traced_peak)
+            tracemalloc.reset_peak()
+        stack.append(frame)
+        rss_start, peak_rss_start = _current_rss(), _peak_rss()
+
+        profiler = cProfile.Profile() if name in self.profile else None
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            stack.pop()
+
+            rss_end = _current_rss()
+            record["seconds"] = elapsed
+            record["rows_per_sec"] = record["rows"] / elapsed if record["rows"] and elapsed > 0 else None
+            record["rss_delta_bytes"] = rss_end - rss_start if rss_end is not None and rss_start is not None else None
+            peak_rss_end = _peak_rss()
+            record["peak_rss_delta_bytes"] = (peak_rss_end - peak_rss_start
+                                              if peak_rss_end is not None and peak_rss_start is not None else None)
+            if self.trace_memory:
+                traced_end, traced_peak = tracemalloc.get_traced_memory()
+                peak = max(traced_peak, frame["child_peak"])
+                record["traced_delta_bytes"] = traced_end - traced_start
+                record["traced_peak_bytes"] = peak - traced_start
+                if stack:
+                    stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)
+            record["depth"] = len(stack)
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+                record["profile"] = path
+            with self._lock:
+                self.records.append(record)
+
+    def instrument(self, name=None):
+        """
+        Decorator recording each call as a stage (default name: module.function). Rows
+        are taken from the first positional argument's length, else from the result's.
+        """
+        def decorator(func):
+            stage_name = name or f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name, rows=_count_rows(args[0]) if args else None) as record:
+                    result = func(*args, **kwargs)
+                    if record["rows"] is None:
+                        first = result[0] if isinstance(result, tuple) and result else result
+                        record["rows"] = _count_rows(first)
+                return result
+            return wrapper
+        return decorator
+
+    def summary(self) -> dict:
+        """
+        Per-stage totals: calls, seconds, rows, overall rows/sec and the largest memory
+        deltas seen.
+        """
+        totals = {}
+        for record in self.records:
+            entry = totals.setdefault(record["stage"], {"calls": 0, "seconds": 0.0, "rows": 0,
+                                                         "peak_rss_delta_bytes": None, "traced_peak_bytes": None})
+            entry["calls"] += 1
+            entry["seconds"] += record["seconds"]
+            entry["rows"] += record["rows"] or 0
+            if record.get("peak_rss_delta_bytes") is not None:
+                entry["peak_rss_delta_bytes"] = max(entry["peak_rss_delta_bytes"] or 0, record["peak_rss_delta_bytes"])
+            if record.get("traced_peak_bytes") is not None:
+                entry["traced_peak_bytes"] = max(entry["traced_peak_bytes"] or 0, record["traced_peak_bytes"])
+        for entry in totals.values():
+            entry["rows_per_sec"] = entry["rows"] / entry["seconds"] if entry["rows"] and entry["seconds"] else None
+        return totals
+
+    def to_json(self, path=None) -> str:
+        text = json.dumps({"records": self.records, "summary": self.summary()}, indent=2)
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text)
+            logger.info(f"Saved stage metrics to {path}")
+        return text
+
+    def to_prometheus(self, prefix="fraud_stage") -> str:
+        """
+        The per-stage summary in the Prometheus text exposition format.
+        """
+        metrics = [
+            ("calls_total", "counter", "Instrumented stage calls.", "calls"),
+            ("seconds_total", "counter", "Wall time spent in the stage.", "seconds"),
+            ("rows_total", "counter", "Rows processed by the stage.", "rows"),
+            ("rows_per_second", "gauge", "Overall stage throughput.", "rows_per_sec"),
+            ("peak_rss_delta_bytes", "gauge", "Largest peak RSS growth during one call.", "peak_rss_delta_bytes"),
+            ("traced_peak_bytes", "gauge", "Largest tracemalloc peak above the call's start.", "traced_peak_bytes"),
+        ]
+        summary = self.summary()
+        lines = []
+        for suffix, kind, help_text, key in metrics:
+            samples = [(stage, entry[key]) for stage, entry in summary.items() if entry[key] is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+            lines.append(f"# TYPE {prefix}_{suffix} {kind}")
+            for stage, value in samples:
+                lines.append(f'{prefix}_{suffix}{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = StageRegistry()
+instrument = REGISTRY.instrument
+stage = REGISTRY.stage
@@ -0,0 +1,99 @@
+# src/ip_lookup.py
+
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_COUNTRY = "Unknown"
+
+
+class IpRangeIndex:
+    """
+    Sorted interval index over the IpAddress_to_Country range table.
+
+    Built once from the range bounds, then looked up with a vectorized
+    searchsorted instead of scanning the whole table per IP. The index only
+    holds plain NumPy arrays, so it pickles cheaply and can be saved to a
+    directory of .npy files that workers memory-map on load.
+    """
+
+    _ARRAYS = ("lower", "upper", "country_codes", "countries")
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray,
+                 country_codes: np.ndarray, countries: np.ndarray):
+        self.lower = lower
+        self.upper = upper
+        self.country_codes = country_codes
+        self.countries = countries
+
+    @classmethod
+    def from_frame(cls, ip_df: pd.DataFrame, lower_col: str = "lower_bound_ip_address",
+                   upper_col: str = "upper_bound_ip_address", country_col: str = "country") -> "IpRangeIndex":
+        """
+        Builds the index from a range table. The input frame is not modified.
+        """
+        ranges = ip_df[[lower_col, upper_col, country_col]].dropna(subset=[lower_col, upper_col])
+        lower = ranges[lower_col].to_numpy(dtype=np.int64)
+        upper = ranges[upper_col].to_numpy(dtype=np.int64)
+
+        order = np.lexsort((upper, lower))
+        codes, countries = pd.factorize(ranges[country_col].fillna(UNKNOWN_COUNTRY))
+        index = cls(
+            lower=np.ascontiguousarray(lower[order]),
+            upper=np.ascontiguousarray(upper[order]),
+            country_codes=codes[order].astype(np.int32),
+            countries=np.asarray(countries, dtype=str),
+        )
+        logger.info(f"Built IP range index with {len(index)} ranges and {len(countries)} countries.")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.lower)
+
+    def lookup_codes(self, ips) -> np.ndarray:
+        """
+        Returns the position in `countries` for each IP, or -1 when no range contains it.
+        Ranges are assumed not to overlap; each IP is matched against the range with
+        the greatest lower bound not above it.
+        """
+        ips = np.asarray(ips, dtype=np.int64)
+        codes = np.full(ips.shape, -1, dtype=np.int32)
+        if not len(self):
+            return codes
+
+        pos = np.searchsorted(self.lower, ips, side="right") - 1
+        safe_pos = np.clip(pos, 0, None)
+        hit = (pos >= 0) & (ips <= self.upper[safe_pos])
+        codes[hit] = self.country_codes[safe_pos[hit]]
+        return codes
+
+    def lookup(self, ips, unknown: str = UNKNOWN_COUNTRY) -> np.ndarray:
+        """
+        Returns the country name for each IP, with `unknown` for IPs outside every range.
+        """
+        codes = self.lookup_codes(ips)
+        labels = np.append(self.countries.astype(object), unknown)
+        return labels[codes]
+
+    def save(self, index_dir: str) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(os.path.join(index_dir, f"{name}.npy"), getattr(self, name))
+        logger.info(f"Saved IP range index to {index_dir}")
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> "IpRangeIndex":
+        """
+        Loads an index written by `save`. With `mmap=True` the arrays are memory-mapped
+        read-only, so many worker processes share one copy through the page cache.
+        """
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in cls._ARRAYS
+        }
+        return cls(**arrays)
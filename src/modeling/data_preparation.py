@@ -1,12 +1,113 @@
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-def load_parquet_data(file_path, target_col='class'):
-    df = pd.read_parquet(file_path)
-    X = df.drop(columns=[target_col])
-    y = df[target_col]
-    return X, y
+def load_parquet_data(file_path, target_col='class', columns=None, filters=None):
+    df = pd.read_parquet(file_path, columns=None if columns is None else list(columns) + [target_col],
+                         filters=filters)
+    y = df.pop(target_col)
+    return df, y
 
 def split_data(X, y, test_size=0.2, random_state=42):
+    from sklearn.model_selection import train_test_split
     return train_test_split(X, y, test_size=test_size, stratify=y, random_state=random_state)
 
+
+class ParquetDataset:
+    """
+    Out-of-core view of a Parquet file or (hive-)partitioned directory for training.
+
+    Only the feature, target and split-key columns are read, `filters` (pyarrow
+    expression or pandas-style tuples) are pushed down to the scan, and record batches
+    are streamed, so memory is bounded by `batch_size` rows rather than the dataset.
+
+    Rows are split by hashing their feature values and label with `seed`, so the split
+    is identical on every pass and across processes, and each row of every class lands
+    in the test split with probability `test_size`: stratified in expectation. Pass
+    e.g. key_cols=['user_id'] to hash that key instead and keep all of a user's
+    transactions on one side.
+    """
+
+    def __init__(self, path, target_col='class', feature_cols=None, filters=None, key_cols=None,
+                 test_size=0.2, seed=42, batch_size=65_536):
+        self.dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        self.target_col = target_col
+        self.feature_cols = list(feature_cols) if feature_cols is not None else [
+            name for name in self.dataset.schema.names if name != target_col]
+        self.filter = pq.filters_to_expression(filters) if isinstance(filters, list) else filters
+        self.key_cols = list(key_cols) if key_cols is not None else None
+        self.test_size = test_size
+        self.seed = seed
+        self.batch_size = batch_size
+
+    def _columns(self):
+        columns = self.feature_cols + [self.target_col]
+        return columns + [c for c in (self.key_cols or []) if c not in columns]
+
+    def _test_mask(self, frame: pd.DataFrame, y: np.ndarray) -> np.ndarray:
+        hash_key = f"{self.seed:016d}"
+        if self.key_cols:
+            hashed = pd.util.hash_pandas_object(frame[self.key_cols], index=False, hash_key=hash_key).to_numpy()
+        else:
+            hashed = pd.util.hash_pandas_object(frame[self.feature_cols], index=False, hash_key=hash_key).to_numpy()
+            hashed = hashed ^ pd.util.hash_array(y, hash_key=hash_key)
+        return (hashed >> np.uint64(11)) / float(1 << 53) < self.test_size
+
+    def iter_frames(self, split=None):
+        """
+        Yields (features DataFrame, target array) per record batch of `split`
+        ('train', 'test' or None for all rows).
+        """
+        scanner = self.dataset.scanner(columns=self._columns(), filter=self.filter, batch_size=self.batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows == 0:
+                continue
+            frame = batch.to_pandas()
+            y = frame[self.target_col].to_numpy()
+            if split is not None:
+                in_test = self._test_mask(frame, y)
+                keep = in_test if split == "test" else ~in_test
+                frame, y = frame[keep], y[keep]
+            if len(y):
+                yield frame[self.feature_cols], y
+
+    def iter_batches(self, split="train", dtype=np.float32):
+        """
+        Yields (X, y) mini-batches with X as a contiguous `dtype` matrix, for
+        models with partial_fit.
+        """
+        for frame, y in self.iter_frames(split):
+            yield np.ascontiguousarray(frame.to_numpy(dtype=dtype)), y
+
+    def read(self, split=None):
+        """
+        Materialises `split` as (X DataFrame, y Series), e.g. for the held-out test set.
+        """
+        frames, targets = [], []
+        for frame, y in self.iter_frames(split):
+            frames.append(frame)
+            targets.append(y)
+        if not frames:
+            return pd.DataFrame(columns=self.feature_cols), pd.Series(name=self.target_col, dtype=float)
+        X = pd.concat(frames, ignore_index=True)
+        return X, pd.Series(np.concatenate(targets), name=self.target_col)
+
+    def class_counts(self, split=None) -> pd.Series:
+        counts = pd.Series(dtype=np.int64)
+        for _, y in self.iter_frames(split):
+            counts = counts.add(pd.Series(y).value_counts(), fill_value=0)
+        return counts.astype(np.int64).sort_index()
+
+
+def fit_incremental(model, dataset: ParquetDataset, epochs=1, classes=None, split="train"):
+    """
+    Trains a partial_fit model (SGDClassifier, MultinomialNB, ...) over the dataset's
+    mini-batches for `epochs` passes; classes default to those seen in `split`.
+    """
+    if classes is None:
+        classes = dataset.class_counts(split).index.to_numpy()
+    for _ in range(epochs):
+        for X, y in dataset.iter_batches(split):
+            model.partial_fit(X, y, classes=classes)
+    return model
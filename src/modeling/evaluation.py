@@ -0,0 +1,184 @@
+# src/modeling/evaluation.py
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrument
+
+
+def _as_1d(y) -> np.ndarray:
+    # A one-column target frame (e.g. read back from yf_test.parquet) counts as 1-D
+    y = np.asarray(y)
+    if y.ndim == 2 and y.shape[1] == 1:
+        return y.ravel()
+    if y.ndim != 1:
+        raise ValueError(f"y_true should be 1-D or a single column, got shape {y.shape}")
+    return y
+
+
+def threshold_sweep(y_true, y_proba, fp_cost=1.0, fn_cost=1.0, pos_label=1) -> pd.DataFrame:
+    """
+    Confusion counts, precision, recall, FPR and cost at every distinct score cut-off,
+    from one descending sort of the scores. A row's threshold flags every transaction
+    with probability >= threshold; cost = fp_cost * FP + fn_cost * FN.
+    """
+    y_true = _as_1d(y_true) == pos_label
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    order = np.argsort(-y_proba, kind="mergesort")
+    scores, hits = y_proba[order], y_true[order]
+
+    # Last position of each run of tied scores
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1] if len(scores) else np.zeros(0, dtype=int)
+    tp = np.cumsum(hits)[last]
+    fp = (last + 1) - tp
+    positives, negatives = int(y_true.sum()), int(len(y_true) - y_true.sum())
+    fn = positives - tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = tp / (tp + fp)
+        recall = tp / positives if positives else np.zeros(len(tp))
+        fpr = fp / negatives if negatives else np.zeros(len(fp))
+    return pd.DataFrame({
+        "threshold": scores[last],
+        "tp": tp, "fp": fp, "fn": fn, "tn": negatives - fp,
+        "precision": precision, "recall": recall, "fpr": fpr,
+        "cost": fp_cost * fp + fn_cost * fn,
+    })
+
+
+def curve_auc(sweep: pd.DataFrame):
+    """
+    ROC-AUC (trapezoidal over all cut-offs) and PR-AUC (average precision) from a sweep,
+    matching roc_auc_score and average_precision_score.
+    """
+    fpr = np.r_[0.0, sweep["fpr"].to_numpy()]
+    tpr = np.r_[0.0, sweep["recall"].to_numpy()]
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+    pr_auc = float(np.sum(np.diff(tpr) * sweep["precision"].to_numpy()))
+    return roc_auc, pr_auc
+
+
+@instrument()
+def evaluate_probabilities(y_true, y_proba, threshold=0.5, fp_cost=1.0, fn_cost=1.0, classes=(0, 1)) -> dict:
+    """
+    All evaluation metrics from one probability vector: ROC-AUC, PR-AUC, the report and
+    confusion matrix at `threshold`, the full threshold sweep and the minimum-cost cut-off.
+    `classes` are the negative and positive labels, in the order of the model's
+    `classes_`; `y_proba` is the probability of the second.
+    """
+    from sklearn.metrics import classification_report
+
+    y_true = _as_1d(y_true)
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    negative, positive = classes[0], classes[1]
+    sweep = threshold_sweep(y_true, y_proba, fp_cost=fp_cost, fn_cost=fn_cost, pos_label=positive)
+    roc_auc, pr_auc = curve_auc(sweep)
+
+    # Same decision rule as predict(): the positive class when its probability beats the other
+    flagged = y_proba > threshold
+    y_pred = np.where(flagged, positive, negative)
+    is_positive = y_true == positive
+    tp = int(np.sum(flagged[is_positive]))
+    fp = int(np.sum(flagged[~is_positive]))
+    positives = int(np.sum(is_positive))
+    conf_matrix = np.array([[len(y_true) - positives - fp, fp], [positives - tp, tp]])
+
+    best = sweep.loc[sweep["cost"].idxmin()] if len(sweep) else None
+    return {
+        "roc_auc": roc_auc,
+        "pr_auc": pr_auc,
+        "report": classification_report(y_true, y_pred, zero_division=0),
+        "conf_matrix": conf_matrix,
+        "curve": sweep,
+        "best_threshold": None if best is None else float(best["threshold"]),
+        "best_cost": None if best is None else float(best["cost"]),
+    }
+
+
+def _fingerprint(X) -> str:
+    import scipy.sparse as sp
+
+    digest = hashlib.sha256()
+    if isinstance(X, pd.DataFrame):
+        digest.update(repr(list(X.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    elif sp.issparse(X):
+        X = X.tocsr()
+        for part in (X.data, X.indices, X.indptr):
+            digest.update(np.ascontiguousarray(part).tobytes())
+    else:
+        X = np.ascontiguousarray(X)
+        digest.update(repr((X.shape, X.dtype.str)).encode())
+        digest.update(X.tobytes())
+    return digest.hexdigest()
+
+
+class EvaluationEngine:
+    """
+    Evaluates models from cached probability vectors.
+
+    Each (model, dataset) pair runs predict_proba once; the positive-class vector is kept
+    in memory and, with `cache_dir`, on disk, so re-evaluating at other thresholds or
+    costs, or comparing many models on one large test set, costs no further inference.
+    Cache keys combine the optional names with a joblib hash of the fitted model and a
+    content hash of X, so a retrained model or changed test data is never served a
+    stale vector, even under the same names or a reused object id.
+    """
+
+    def __init__(self, cache_dir=None, fp_cost=1.0, fn_cost=1.0):
+        self.cache_dir = cache_dir
+        self.fp_cost = fp_cost
+        self.fn_cost = fn_cost
+        self._proba = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def predict_proba(self, model, X, model_name=None, dataset_name=None, data_fingerprint=None) -> np.ndarray:
+        import joblib
+
+        key = (model_name, joblib.hash(model), dataset_name, data_fingerprint or _fingerprint(X))
+        if key in self._proba:
+            return self._proba[key]
+
+        path = None
+        if self.cache_dir:
+            file_key = hashlib.sha256(repr(key).encode()).hexdigest()[:20]
+            path = os.path.join(self.cache_dir, f"proba-{file_key}.npy")
+            if os.path.exists(path):
+                self._proba[key] = np.load(path)
+                return self._proba[key]
+
+        proba = model.predict_proba(X)[:, 1]
+        if path:
+            np.save(path, proba)
+        self._proba[key] = proba
+        return proba
+
+    def evaluate(self, model, X, y, model_name=None, dataset_name=None, threshold=0.5,
+                 data_fingerprint=None) -> dict:
+        proba = self.predict_proba(model, X, model_name=model_name, dataset_name=dataset_name,
+                                   data_fingerprint=data_fingerprint)
+        return evaluate_probabilities(y, proba, threshold=threshold, fp_cost=self.fp_cost, fn_cost=self.fn_cost,
+                                      classes=getattr(model, "classes_", (0, 1)))
+
+    def compare(self, models: dict, X, y, dataset_name=None, threshold=0.5) -> pd.DataFrame:
+        """
+        One summary row per named model: AUCs, confusion counts at `threshold` and the
+        minimum-cost threshold.
+        """
+        # X is hashed once for all models
+        data_fingerprint = _fingerprint(X)
+        rows = []
+        for name, model in models.items():
+            result = self.evaluate(model, X, y, model_name=name, dataset_name=dataset_name, threshold=threshold,
+                                   data_fingerprint=data_fingerprint)
+            (tn, fp), (fn, tp) = result["conf_matrix"]
+            rows.append({
+                "model": name, "roc_auc": result["roc_auc"], "pr_auc": result["pr_auc"],
+                "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+                "best_threshold": result["best_threshold"], "best_cost": result["best_cost"],
+            })
+        return pd.DataFrame(rows).set_index("model")
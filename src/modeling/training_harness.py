@@ -0,0 +1,190 @@
+# src/modeling/training_harness.py
+
+import hashlib
+import importlib
+import inspect
+import logging
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from src.modeling.evaluation import evaluate_probabilities
+from src.transformers import get_preprocessor, fit_transform_to_df, transform_to_df, apply_balancing
+from src.instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+# Model name -> (estimator class path, default params matching train_and_evaulate);
+# classes are imported in the worker that fits them
+MODELS = {
+    "logistic_regression": ("sklearn.linear_model.LogisticRegression", {"max_iter": 1000, "random_state": 42}),
+    "random_forest": ("sklearn.ensemble.RandomForestClassifier", {"n_estimators": 100, "random_state": 42}),
+}
+
+
+def _estimator_class(path: str):
+    module, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+DEFAULT_CONFIGS = [
+    {"name": "logistic_regression", "model": "logistic_regression", "params": {}},
+    {"name": "random_forest", "model": "random_forest", "params": {}},
+]
+
+
+def dataset_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    """
+    Content hash of the features, target and column layout.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(list(X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Distributions whose behaviour changes the prepared folds
+FOLD_LIBRARIES = ("scikit-learn", "imbalanced-learn")
+
+
+def fold_code_version() -> str:
+    """
+    Hash of the code that prepares a fold: the transformers module, `prepare_fold`
+    itself and the installed versions of FOLD_LIBRARIES. Part of every fold cache key,
+    so editing the preprocessing or upgrading a library invalidates cached folds.
+    """
+    from importlib.metadata import PackageNotFoundError, version
+
+    import src.transformers
+
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(src.transformers).encode())
+    digest.update(inspect.getsource(prepare_fold).encode())
+    for dist in FOLD_LIBRARIES:
+        try:
+            digest.update(f"{dist}=={version(dist)}".encode())
+        except PackageNotFoundError:
+            digest.update(f"{dist} missing".encode())
+    return digest.hexdigest()
+
+
+def _fold_cache_path(cache_dir, data_key, fold, n_splits, numeric_cols, categorical_cols, balance_strategy,
+                     sampling_strategy, code_version):
+    config = repr((data_key, fold, n_splits, list(numeric_cols), list(categorical_cols), balance_strategy,
+                   sampling_strategy, code_version))
+    key = hashlib.sha256(config.encode()).hexdigest()[:20]
+    return os.path.join(cache_dir, f"fold-{fold}-{key}.joblib")
+
+
+def prepare_fold(X, y, train_idx, test_idx, numeric_cols, categorical_cols, balance_strategy, path,
+                 sampling_strategy="auto"):
+    """
+    Fits the preprocessor on the training fold, balances it and writes the fold's
+    matrices to `path`. Skipped when the file already exists.
+    """
+    if os.path.exists(path):
+        logger.info(f"Using cached fold {path}")
+        return path
+
+    preprocessor = get_preprocessor(numeric_cols, categorical_cols)
+    X_train = fit_transform_to_df(preprocessor, X.iloc[train_idx], drop_constant=True)
+    X_test = transform_to_df(preprocessor, X.iloc[test_idx], selected_features=list(X_train.columns))
+    y_train = y.iloc[train_idx]
+    if balance_strategy:
+        X_train, y_train = apply_balancing(X_train, y_train, strategy=balance_strategy,
+                                           sampling_strategy=sampling_strategy)
+
+    fold = {
+        "X_train": np.ascontiguousarray(X_train, dtype=np.float64),
+        "y_train": np.asarray(y_train),
+        "X_test": X_test.to_numpy(dtype=np.float64),
+        "y_test": y.iloc[test_idx].to_numpy(),
+        "feature_names": list(X_test.columns),
+    }
+    # Written to a temporary name first so a concurrent run never reads a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(fold, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _run_config(config: dict, fold: int, path: str) -> dict:
+    data = joblib.load(path, mmap_mode="r")
+    class_path, defaults = MODELS[config["model"]]
+    estimator_cls = _estimator_class(class_path)
+    params = {**defaults, **config.get("params", {})}
+    if "n_jobs" in estimator_cls().get_params():
+        # Parallelism comes from the harness; one thread per model avoids oversubscription
+        params.setdefault("n_jobs", 1)
+    model = estimator_cls(**params)
+
+    start = time.perf_counter()
+    model.fit(data["X_train"], data["y_train"])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_proba = model.predict_proba(data["X_test"])[:, 1]
+    predict_time = time.perf_counter() - start
+    metrics = evaluate_probabilities(data["y_test"], y_proba, classes=model.classes_)
+
+    return {
+        "config": config["name"],
+        "fold": fold,
+        "train_rows": len(data["y_train"]),
+        "test_rows": len(data["y_test"]),
+        "fit_time": fit_time,
+        "predict_time": predict_time,
+        "roc_auc": metrics["roc_auc"],
+        "pr_auc": metrics["pr_auc"],
+    }
+
+
+@instrument()
+def run_experiments(X: pd.DataFrame, y: pd.Series, numeric_cols, categorical_cols, configs=None,
+                    n_splits=5, balance_strategy="smote", sampling_strategy="auto", cache_dir="../data/cache/folds",
+                    n_jobs=-1) -> pd.DataFrame:
+    """
+    Cross-validates every model config over stratified folds in a process pool.
+
+    Each fold is preprocessed and balanced once, cached on disk under a key derived
+    from the data hash, the preprocessing and balancing config and `fold_code_version`,
+    and memory-mapped by every model trained on it. Repeat runs on unchanged data and
+    code skip preprocessing and balancing.
+    Returns one row per (config, fold) with fit/predict times, ROC-AUC and PR-AUC.
+    """
+    configs = configs or DEFAULT_CONFIGS
+    os.makedirs(cache_dir, exist_ok=True)
+    data_key = dataset_fingerprint(X[list(numeric_cols) + list(categorical_cols)], y)
+
+    from sklearn.model_selection import StratifiedKFold
+
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+    folds = list(splitter.split(np.zeros(len(y)), y))
+    code_version = fold_code_version()
+    paths = [
+        _fold_cache_path(cache_dir, data_key, i, n_splits, numeric_cols, categorical_cols, balance_strategy,
+                         sampling_strategy, code_version)
+        for i in range(n_splits)
+    ]
+
+    start = time.perf_counter()
+    pending = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+    Parallel(n_jobs=n_jobs)(
+        delayed(prepare_fold)(X, y, folds[i][0], folds[i][1], numeric_cols, categorical_cols,
+                              balance_strategy, paths[i], sampling_strategy)
+        for i in pending
+    )
+    logger.info(f"Prepared {len(pending)} of {n_splits} folds in {time.perf_counter() - start:.1f}s "
+                f"({n_splits - len(pending)} from cache).")
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_run_config)(config, i, paths[i]) for config in configs for i in range(n_splits)
+    )
+    results = pd.DataFrame(results)
+    logger.info(f"Mean scores per config:\n{results.groupby('config')[['roc_auc', 'pr_auc', 'fit_time']].mean()}")
+    return results
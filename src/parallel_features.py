@@ -0,0 +1,226 @@
+# src/parallel_features.py
+
+import argparse
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from src.instrumentation import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STEPS = ("time", "frequency", "ip_country", "amount_flags", "time_to_purchase")
+PART_FILE = "part-{:05d}.parquet"
+PART_GLOB = "part-*.parquet"
+SHM_DIR = "/dev/shm"
+
+
+def _apply_step(df: pd.DataFrame, step: str, ip_index=None, threshold: float = 100) -> pd.DataFrame:
+    if step == "time":
+        from src.feature_engineering import add_time_features
+        return add_time_features(df)
+    if step == "frequency":
+        from src.feature_engineering import add_frequency_features
+        return add_frequency_features(df)
+    if step == "ip_country":
+        from src.feature_engineering import merge_ip_country
+        return merge_ip_country(df, ip_index)
+    if step == "amount_flags":
+        from src.advanced.fraud_feature_engineering import add_transaction_amount_flags
+        return add_transaction_amount_flags(df, threshold=threshold)
+    if step == "time_to_purchase":
+        from src.advanced.fraud_feature_engineering import add_time_to_purchase
+        return add_time_to_purchase(df)
+    raise ValueError(f"Unknown feature step {step!r}; expected one of {DEFAULT_STEPS}")
+
+
+def connected_partitions(keys, key_cols=("user_id", "device_id"), n_partitions: int = 8) -> np.ndarray:
+    """
+    Partition number for every row of `keys` (a DataFrame or Arrow table), such that
+    rows sharing a value in any of `key_cols` land in the same partition.
+
+    Key values are linked through the rows they appear on (a user's purchases, the
+    users sharing a device, ...) and whole connected groups are dealt round-robin to
+    the partitions, so per-user and per-device features computed on a partition equal
+    those computed on the whole frame. Rows without any key are dealt out individually.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    if isinstance(keys, pd.DataFrame):
+        keys = pa.Table.from_pandas(keys, preserve_index=False)
+    key_cols = [col for col in key_cols if col in keys.column_names]
+    n_rows = keys.num_rows
+    if not key_cols:
+        return (np.arange(n_rows) % n_partitions).astype(np.int32)
+
+    # One graph node per distinct key value; every row joins its first present key to
+    # the others, so keys seen together end up in one connected group
+    nodes = np.empty((n_rows, len(key_cols)), dtype=np.int64)
+    offset = 0
+    for j, col in enumerate(key_cols):
+        encoded = pc.dictionary_encode(keys[col]).combine_chunks()
+        codes = encoded.indices.to_numpy(zero_copy_only=False)
+        valid = encoded.indices.is_valid().to_numpy(zero_copy_only=False)
+        nodes[:, j] = np.where(valid, codes + offset, -1)
+        offset += len(encoded.dictionary)
+    anchor = nodes[:, 0].copy()
+    for j in range(1, len(key_cols)):
+        anchor = np.where(anchor < 0, nodes[:, j], anchor)
+    present = nodes >= 0
+    src, dst = np.broadcast_to(anchor[:, None], nodes.shape)[present], nodes[present]
+    graph = coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(offset, offset))
+    n_groups, labels = connected_components(graph, directed=False)
+
+    keyless = anchor < 0
+    groups = np.empty(n_rows, dtype=np.int64)
+    groups[~keyless] = labels[anchor[~keyless]]
+    groups[keyless] = n_groups + np.arange(keyless.sum())
+    return (groups % n_partitions).astype(np.int32)
+
+
+def _spill_partitions(table: pa.Table, partitions: np.ndarray, n_partitions: int, spill_dir: str) -> list:
+    """
+    Writes each partition of `table` as an Arrow IPC file, which workers memory-map
+    instead of receiving a pickled copy. Returns [(partition, path, rows)].
+    """
+    order = np.argsort(partitions, kind="stable")
+    bounds = np.searchsorted(partitions[order], np.arange(n_partitions + 1))
+    table = table.take(pa.array(order))
+    spilled = []
+    for part in range(n_partitions):
+        start, stop = bounds[part], bounds[part + 1]
+        if stop == start:
+            continue
+        path = os.path.join(spill_dir, f"part-{part:05d}.arrow")
+        with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table.slice(start, stop - start))
+        spilled.append((part, path, int(stop - start)))
+    return spilled
+
+
+def _feature_partition(arrow_path, output_path, steps, ip_index_dir=None, threshold=100, instrument=None):
+    """
+    Runs `steps` on one memory-mapped partition in a worker and writes the result to
+    `output_path`. Returns (rows written, seconds, instrumentation records).
+    """
+    if instrument is not None:
+        REGISTRY.reset()
+        REGISTRY.enable(**instrument)
+    start = time.perf_counter()
+    ip_index = None
+    if ip_index_dir is not None:
+        from src.ip_lookup import IpRangeIndex
+        ip_index = IpRangeIndex.load(ip_index_dir, mmap=True)
+
+    with REGISTRY.stage("parallel_features.partition"):
+        with pa.memory_map(arrow_path, "r") as source:
+            df = ipc.open_file(source).read_all().to_pandas()
+        for step in steps:
+            df = _apply_step(df, step, ip_index=ip_index, threshold=threshold)
+        df.to_parquet(output_path, index=False)
+    return len(df), time.perf_counter() - start, list(REGISTRY.records) if instrument is not None else []
+
+
+def run_parallel_features(input_path, output_dir, ip_country=None, steps=DEFAULT_STEPS,
+                          key_cols=("user_id", "device_id"), n_partitions=None, jobs=None,
+                          threshold=100, spill_dir=None, instrument=None) -> dict:
+    """
+    Runs the feature steps over a cleaned Fraud_Data Parquet file on a process pool and
+    writes one Parquet file per partition into `output_dir`.
+
+    Rows are split with `connected_partitions`, so the group-based features (frequency
+    counts, secs-since-previous) are exact per partition. Partitions are handed to
+    workers as Arrow IPC files in `spill_dir` (shared memory under /dev/shm when it
+    exists), and the IP range index as memory-mapped arrays; each worker writes its own
+    output, so no frame is pickled in either direction. `ip_country` is the range table
+    (path or DataFrame), needed for the 'ip_country' step. With `instrument`
+    (REGISTRY.enable kwargs), the workers' stage records are collected into REGISTRY.
+    Returns {'partitions', 'rows', 'seconds', 'worker_seconds'}.
+    """
+    unknown = set(steps) - set(DEFAULT_STEPS)
+    if unknown:
+        raise ValueError(f"Unknown feature steps {sorted(unknown)}; expected some of {DEFAULT_STEPS}")
+    if "ip_country" in steps and ip_country is None:
+        raise ValueError("The 'ip_country' step needs the ip_country range table.")
+    jobs = jobs or os.cpu_count() or 1
+    # A few partitions per worker even out differences in partition size
+    n_partitions = n_partitions or jobs * 4
+    start = time.perf_counter()
+
+    table = pq.read_table(input_path)
+    keys = table.select([col for col in key_cols if col in table.column_names])
+    partitions = connected_partitions(keys, key_cols, n_partitions)
+    largest = np.bincount(partitions, minlength=n_partitions).max() if len(partitions) else 0
+    logger.info(f"Split {table.num_rows} rows into {n_partitions} partitions "
+                f"(largest {largest} rows) by {keys.column_names}.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, PART_GLOB)):
+        os.remove(stale)
+    if spill_dir is None and os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        spill_dir = SHM_DIR
+    work_dir = tempfile.mkdtemp(prefix="parallel_features_", dir=spill_dir)
+    try:
+        spilled = _spill_partitions(table, partitions, n_partitions, work_dir)
+        del table, keys
+        ip_index_dir = None
+        if "ip_country" in steps:
+            from src.data_loader import load_csv
+            from src.ip_lookup import IpRangeIndex
+
+            ip_df = load_csv(ip_country) if isinstance(ip_country, str) else ip_country
+            ip_index_dir = os.path.join(work_dir, "ip_index")
+            IpRangeIndex.from_frame(ip_df).save(ip_index_dir)
+
+        rows, worker_seconds = 0, 0.0
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(_feature_partition, path, os.path.join(output_dir, PART_FILE.format(part)),
+                            tuple(steps), ip_index_dir, threshold, instrument): part
+                for part, path, _ in spilled
+            }
+            for future in as_completed(futures):
+                written, elapsed, records = future.result()
+                rows += written
+                worker_seconds += elapsed
+                REGISTRY.records.extend(records)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Wrote {rows} rows in {len(spilled)} partitions to {output_dir} in {seconds:.1f}s "
+                f"({worker_seconds:.1f}s of worker time on {jobs} workers).")
+    return {"partitions": len(spilled), "rows": rows, "seconds": seconds, "worker_seconds": worker_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute fraud features over partitions on a process pool.")
+    parser.add_argument("input", help="cleaned Fraud_Data Parquet file")
+    parser.add_argument("output_dir", help="directory for the partitioned Parquet output")
+    parser.add_argument("--ip-country", help="IpAddress_to_Country CSV (required for the ip_country step)")
+    parser.add_argument("--steps", nargs="+", default=list(DEFAULT_STEPS), choices=DEFAULT_STEPS)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--partitions", type=int, default=None, help="number of partitions (default: 4 per worker)")
+    parser.add_argument("--spill-dir", default=None, help="where partitions are staged (default: /dev/shm)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    result = run_parallel_features(args.input, args.output_dir, ip_country=args.ip_country, steps=args.steps,
+                                   n_partitions=args.partitions, jobs=args.jobs, spill_dir=args.spill_dir)
+    print(f"{result['rows']} rows in {result['partitions']} partitions, {result['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
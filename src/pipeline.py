@@ -0,0 +1,402 @@
+# src/pipeline.py
+#
+# Declarative runner for the notebook flow: raw CSV -> cleaned -> features ->
+# advanced features -> preprocessed/balanced matrices -> trained models.
+# Stages form a DAG and exchange Parquet/joblib files. Each stage is
+# fingerprinted from its code, parameters, raw input contents and upstream
+# fingerprints; a rerun executes only stages whose fingerprint changed or
+# whose outputs are missing, and runs independent branches (e-commerce and
+# creditcard) in parallel processes. Run from the repository root:
+#
+#     python -m src.pipeline                     # run what is out of date
+#     python -m src.pipeline --dry-run           # show what would run
+#     python -m src.pipeline --stages train_creditcard --force
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.data_loader import file_fingerprint
+from src.instrumentation import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = ".pipeline_state.json"
+
+FRAUD_NUMERIC_COLS = [
+    'purchase_value', 'age', 'time_since_signup',
+    'user_transaction_count', 'device_transaction_count',
+    'time_to_purchase', 'high_value_transaction'
+]
+FRAUD_CATEGORICAL_COLS = ['source', 'browser', 'sex', 'country']
+CREDITCARD_NUMERIC_COLS = [f'V{i}' for i in range(1, 29)] + ['Amount']
+
+
+class Stage:
+    """
+    One pipeline step. `func(inputs, outputs, **params)` reads the files in `inputs`
+    and writes every file in `outputs` (both dicts of name -> path). `deps` are
+    upstream stage names; `raw_inputs` names the entries of `inputs` that no stage
+    produces and are fingerprinted by content. `code` lists the modules whose source
+    is part of the fingerprint.
+    """
+
+    def __init__(self, name, func, inputs, outputs, deps=(), raw_inputs=(), code=(), params=None):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = list(deps)
+        self.raw_inputs = list(raw_inputs)
+        self.code = list(code)
+        self.params = params or {}
+
+
+# Stage implementations
+
+def clean_fraud_stage(inputs, outputs):
+    from src.data_loader import load_csv
+    from src.preprocessing import preprocess, save_fill_values
+
+    df, fill_values = preprocess(load_csv(inputs["raw"]), datetime_cols=["signup_time", "purchase_time"])
+    df.to_parquet(outputs["cleaned"], index=False)
+    save_fill_values(fill_values, outputs["fill_values"])
+
+
+def clean_creditcard_stage(inputs, outputs):
+    from src.data_loader import load_csv
+    from src.preprocessing import preprocess, save_fill_values
+
+    df, fill_values = preprocess(load_csv(inputs["raw"]))
+    df.to_parquet(outputs["cleaned"], index=False)
+    save_fill_values(fill_values, outputs["fill_values"])
+
+
+def fraud_features_stage(inputs, outputs):
+    from src.data_loader import load_csv
+    from src.feature_engineering import add_time_features, add_frequency_features, merge_ip_country
+
+    df = pd.read_parquet(inputs["cleaned"])
+    df = add_time_features(df)
+    df = add_frequency_features(df)
+    df = merge_ip_country(df, load_csv(inputs["ip_country"]))
+    df.to_parquet(outputs["features"], index=False)
+
+
+def fraud_advanced_stage(inputs, outputs):
+    from src.advanced.fraud_feature_engineering import add_transaction_amount_flags, add_time_to_purchase
+    from src.advanced.fraud_risk_scoring import score_transaction_risk
+    from src.advanced.fraud_clustering_analysis import perform_clustering_analysis
+    from src.advanced.outlier_detection import detect_outliers_iforest
+
+    df = pd.read_parquet(inputs["features"])
+    df = add_transaction_amount_flags(df)
+    df = add_time_to_purchase(df)
+    df = score_transaction_risk(df)
+    df = perform_clustering_analysis(df)
+    df = detect_outliers_iforest(df)
+    df.to_parquet(outputs["enriched"], index=False)
+
+
+def fraud_compact_stage(inputs, outputs):
+    from src.dtype_optimization import optimize_dtypes, check_parquet_roundtrip, save_dtype_plan
+
+    df, plan, report = optimize_dtypes(pd.read_parquet(inputs["enriched"]), inplace=True)
+    if not check_parquet_roundtrip(df, outputs["compact"]):
+        raise ValueError("Compact frame did not survive the Parquet round trip.")
+    save_dtype_plan(plan, outputs["dtype_plan"])
+    report.to_csv(outputs["memory_report"])
+
+
+def transform_stage(inputs, outputs, numeric_cols, categorical_cols, target_col):
+    from src.transformers import get_preprocessor, fit_transform_to_df, apply_balancing
+
+    df = pd.read_parquet(inputs["data"])
+    preprocessor = get_preprocessor(numeric_cols, categorical_cols)
+    X_trans = fit_transform_to_df(preprocessor, df[numeric_cols + categorical_cols], drop_constant=True)
+    np.save(outputs["feature_names"], X_trans.columns)
+
+    X_bal, y_bal = apply_balancing(X_trans, df[target_col], strategy="smote")
+    X_bal = pd.DataFrame(X_bal, columns=X_trans.columns)
+    joblib.dump(preprocessor, outputs["preprocessor"])
+    X_bal.to_parquet(outputs["X_balanced"])
+    pd.DataFrame({target_col: y_bal}).to_parquet(outputs["y_balanced"])
+
+
+def train_stage(inputs, outputs, target_col, test_size):
+    from src.modeling.data_preparation import split_data
+    from src.modeling.train_and_evaulate import train_logistic_regression, train_random_forest
+
+    X = pd.read_parquet(inputs["X_balanced"])
+    y = pd.read_parquet(inputs["y_balanced"])[target_col]
+    X_train, X_test, y_train, y_test = split_data(X, y, test_size=test_size)
+    joblib.dump(train_logistic_regression(X_train, y_train), outputs["lr_model"])
+    joblib.dump(train_random_forest(X_train, y_train, n_jobs=-1), outputs["rf_model"])
+    X_test.to_parquet(outputs["X_test"], index=False)
+    y_test.to_frame().to_parquet(outputs["y_test"], index=False)
+
+
+def default_stages(data_dir="data", models_dir="models"):
+    raw = lambda name: os.path.join(data_dir, "raw", name)
+    processed = lambda name: os.path.join(data_dir, "processed", name)
+    model = lambda name: os.path.join(models_dir, name)
+
+    return [
+        Stage("clean_fraud", clean_fraud_stage,
+              inputs={"raw": raw("Fraud_Data.csv")},
+              outputs={"cleaned": processed("fraud_data_cleaned.parquet"),
+                       "fill_values": model("fill_values_fraud.pkl")},
+              raw_inputs=["raw"], code=["src.data_loader", "src.preprocessing"]),
+        Stage("clean_creditcard", clean_creditcard_stage,
+              inputs={"raw": raw("creditcard.csv")},
+              outputs={"cleaned": processed("creditcard_data_cleaned.parquet"),
+                       "fill_values": model("fill_values_creditcard.pkl")},
+              raw_inputs=["raw"], code=["src.data_loader", "src.preprocessing"]),
+        Stage("fraud_features", fraud_features_stage,
+              inputs={"cleaned": processed("fraud_data_cleaned.parquet"),
+                      "ip_country": raw("IpAddress_to_Country.csv")},
+              outputs={"features": processed("fraud_data_basic_features.parquet")},
+              deps=["clean_fraud"], raw_inputs=["ip_country"],
+              code=["src.feature_engineering", "src.frequency_store", "src.ip_lookup", "src.time_features"]),
+        Stage("fraud_advanced", fraud_advanced_stage,
+              inputs={"features": processed("fraud_data_basic_features.parquet")},
+              outputs={"enriched": processed("fraud_data_advanced_enriched.parquet")},
+              deps=["fraud_features"],
+              code=["src.advanced.fraud_feature_engineering", "src.time_features", "src.advanced.fraud_risk_scoring",
+                    "src.advanced.fraud_clustering_analysis", "src.advanced.outlier_detection"]),
+        Stage("fraud_compact", fraud_compact_stage,
+              inputs={"enriched": processed("fraud_data_advanced_enriched.parquet")},
+              outputs={"compact": processed("fraud_data_compact.parquet"),
+                       "dtype_plan": model("dtype_plan_fraud.pkl"),
+                       "memory_report": processed("fraud_data_compact_memory.csv")},
+              deps=["fraud_advanced"], code=["src.dtype_optimization"]),
+        Stage("transform_fraud", transform_stage,
+              inputs={"data": processed("fraud_data_compact.parquet")},
+              outputs={"preprocessor": model("preprocessor_fraud.pkl"),
+                       "feature_names": model("feature_names_fraud.npy"),
+                       "X_balanced": processed("Xf_balanced.parquet"),
+                       "y_balanced": processed("yf_balanced.parquet")},
+              deps=["fraud_compact"], code=["src.transformers"],
+              params={"numeric_cols": FRAUD_NUMERIC_COLS, "categorical_cols": FRAUD_CATEGORICAL_COLS,
+                      "target_col": "class"}),
+        Stage("transform_creditcard", transform_stage,
+              inputs={"data": processed("creditcard_data_cleaned.parquet")},
+              outputs={"preprocessor": model("preprocessor_creditcard.pkl"),
+                       "feature_names": model("feature_names_creditcard.npy"),
+                       "X_balanced": processed("Xcc_balanced.parquet"),
+                       "y_balanced": processed("ycc_balanced.parquet")},
+              deps=["clean_creditcard"], code=["src.transformers"],
+              params={"numeric_cols": CREDITCARD_NUMERIC_COLS, "categorical_cols": [], "target_col": "Class"}),
+        Stage("train_fraud", train_stage,
+              inputs={"X_balanced": processed("Xf_balanced.parquet"), "y_balanced": processed("yf_balanced.parquet")},
+              outputs={"lr_model": model("lr_fraud_model.pkl"), "rf_model": model("rf_fraud_model.pkl"),
+                       "X_test": processed("Xf_test.parquet"), "y_test": processed("yf_test.parquet")},
+              deps=["transform_fraud"], code=["src.modeling.data_preparation", "src.modeling.train_and_evaulate"],
+              params={"target_col": "class", "test_size": 0.2}),
+        Stage("train_creditcard", train_stage,
+              inputs={"X_balanced": processed("Xcc_balanced.parquet"), "y_balanced": processed("ycc_balanced.parquet")},
+              outputs={"lr_model": model("lr_creditcard_model.pkl"), "rf_model": model("rf_creditcard_model.pkl"),
+                       "X_test": processed("Xc_test.parquet"), "y_test": processed("yc_test.parquet")},
+              deps=["transform_creditcard"], code=["src.modeling.data_preparation", "src.modeling.train_and_evaulate"],
+              params={"target_col": "Class", "test_size": 0.3}),
+    ]
+
+
+# Scheduling
+
+def _topological_order(stages):
+    by_name = {stage.name: stage for stage in stages}
+    order, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline has a cycle through stage '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(by_name[name])
+
+    for stage in stages:
+        visit(stage.name)
+    return order
+
+
+def _module_source_hash(module_name):
+    path = inspect.getsourcefile(importlib.import_module(module_name))
+    return file_fingerprint(path)
+
+
+def stage_fingerprints(stages):
+    """
+    Fingerprint per stage from its function source, parameters, code modules, the
+    contents of its raw inputs and its upstream stages' fingerprints.
+    """
+    fingerprints = {}
+    for stage in _topological_order(stages):
+        digest = hashlib.sha256()
+        digest.update(inspect.getsource(stage.func).encode())
+        digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+        digest.update(json.dumps(stage.outputs, sort_keys=True).encode())
+        for module_name in stage.code:
+            digest.update(_module_source_hash(module_name).encode())
+        for name in stage.raw_inputs:
+            path = stage.inputs[name]
+            digest.update(file_fingerprint(path).encode() if os.path.exists(path) else b"missing")
+        for dep in stage.deps:
+            digest.update(fingerprints[dep].encode())
+        fingerprints[stage.name] = digest.hexdigest()
+    return fingerprints
+
+
+def _run_stage(stage, instrument=None):
+    """
+    Runs one stage in a worker; with `instrument` (REGISTRY.enable kwargs) also returns
+    the worker's stage records, the stage itself recorded as 'pipeline.<name>'.
+    """
+    for path in stage.outputs.values():
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if instrument is not None:
+        REGISTRY.reset()
+        REGISTRY.enable(**instrument)
+    start = time.perf_counter()
+    with REGISTRY.stage(f"pipeline.{stage.name}"):
+        stage.func(stage.inputs, stage.outputs, **stage.params)
+    return time.perf_counter() - start, list(REGISTRY.records) if instrument is not None else []
+
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def run_pipeline(stages, targets=None, force=False, jobs=None, dry_run=False, state_path=None, instrument=None):
+    """
+    Runs the out-of-date stages needed for `targets` (all stages by default), starting
+    each as soon as its upstream stages finish. Returns {stage: 'ran' | 'skipped' | 'pending'}.
+    With `instrument` (kwargs for `REGISTRY.enable`), the workers' stage metrics are
+    collected into this process's REGISTRY.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    state_path = state_path or os.path.join("data", "processed", STATE_FILE)
+
+    selected = set()
+    pending_names = list(targets or by_name)
+    while pending_names:
+        name = pending_names.pop()
+        if name not in selected:
+            selected.add(name)
+            pending_names.extend(by_name[name].deps)
+    order = [stage for stage in _topological_order(stages) if stage.name in selected]
+
+    fingerprints = stage_fingerprints(stages)
+    state = _load_state(state_path)
+    stale = set()
+    for stage in order:
+        outputs_exist = all(os.path.exists(path) for path in stage.outputs.values())
+        if force or not outputs_exist or state.get(stage.name) != fingerprints[stage.name] \
+                or any(dep in stale for dep in stage.deps):
+            stale.add(stage.name)
+
+    status = {stage.name: ("pending" if stage.name in stale else "skipped") for stage in order}
+    for stage in order:
+        logger.info(f"{stage.name}: {'out of date' if stage.name in stale else 'up to date'}")
+    if dry_run or not stale:
+        return status
+
+    done = {stage.name for stage in order if stage.name not in stale}
+    waiting = [stage for stage in order if stage.name in stale]
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while waiting or running:
+            for stage in [s for s in waiting if all(dep in done for dep in s.deps)]:
+                logger.info(f"Starting stage {stage.name}")
+                running[pool.submit(_run_stage, stage, instrument)] = stage
+                waiting.remove(stage)
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                try:
+                    elapsed, records = future.result()
+                except Exception:
+                    logger.error(f"Stage {stage.name} failed; downstream stages were not run.")
+                    for other in running:
+                        other.cancel()
+                    raise
+                logger.info(f"Finished stage {stage.name} in {elapsed:.1f}s")
+                REGISTRY.records.extend(records)
+                done.add(stage.name)
+                status[stage.name] = "ran"
+                # Recorded per stage so an interrupted run resumes where it stopped
+                state[stage.name] = fingerprints[stage.name]
+                _save_state(state_path, state)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fraud detection pipeline incrementally.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--stages", nargs="+", help="target stages; their upstream stages are included")
+    parser.add_argument("--force", action="store_true", help="rerun selected stages even if up to date")
+    parser.add_argument("--jobs", type=int, default=None, help="maximum stages run concurrently")
+    parser.add_argument("--dry-run", action="store_true", help="report out-of-date stages without running")
+    parser.add_argument("--list", action="store_true", help="list stages and their dependencies")
+    parser.add_argument("--metrics", help="write per-function stage metrics here (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--trace-memory", action="store_true", help="add tracemalloc deltas to --metrics")
+    parser.add_argument("--profile", nargs="+", default=[], help="instrumented stage names to cProfile")
+    parser.add_argument("--profile-dir", default="reports/profiles")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    stages = default_stages(args.data_dir, args.models_dir)
+    if args.list:
+        for stage in _topological_order(stages):
+            print(f"{stage.name:<22} <- {', '.join(stage.deps) or '(raw data)'}")
+        return
+
+    unknown = set(args.stages or []) - {stage.name for stage in stages}
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+    instrument = None
+    if args.metrics or args.profile:
+        instrument = {"trace_memory": args.trace_memory, "profile": args.profile, "profile_dir": args.profile_dir}
+    status = run_pipeline(stages, targets=args.stages, force=args.force, jobs=args.jobs, dry_run=args.dry_run,
+                          state_path=os.path.join(args.data_dir, "processed", STATE_FILE), instrument=instrument)
+    for name, result in status.items():
+        print(f"{name:<22} {result}")
+
+    if args.metrics:
+        if args.metrics.endswith(".prom"):
+            with open(args.metrics, "w") as f:
+                f.write(REGISTRY.to_prometheus())
+        else:
+            REGISTRY.to_json(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
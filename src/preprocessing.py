@@ -4,64 +4,154 @@ import pandas as pd
 import numpy as np
 import logging
 import os
+import joblib
 
-logging.basicConfig(level=logging.INFO)
+from src.instrumentation import instrument
+
+logger = logging.getLogger(__name__)
 
 
 def report_missing_values(df: pd.DataFrame):
     missing = df.isnull().sum()
     missing = missing[missing > 0].sort_values(ascending=False)
     if not missing.empty:
-        logging.info(f"Missing values summary:\n{missing}")
+        logger.info(f"Missing values summary:\n{missing}")
+    else:
+        logger.info("No missing values detected.")
+
+
+@instrument()
+def fit_fill_values(df: pd.DataFrame, drop_threshold=0.5, fillna_numeric=True) -> dict:
+    """
+    Computes the imputation state for a frame in one pass: the columns kept after
+    dropping those with more than `drop_threshold` missing values, the median of
+    every kept numeric column and the mode of every kept categorical column.
+    """
+    non_null = df.notna().sum()
+    columns = non_null.index[non_null >= drop_threshold * len(df)].tolist()
+
+    # Select on an empty slice so only dtypes are inspected, not data
+    schema = df.iloc[:0][columns]
+    numeric_cols = schema.select_dtypes(include=[np.number]).columns.tolist() if fillna_numeric else []
+    categorical_cols = schema.select_dtypes(include=['object', 'category', 'string']).columns.tolist()
+
+    fill_values = {}
+    if numeric_cols:
+        fill_values.update(df[numeric_cols].median().to_dict())
+    if categorical_cols:
+        modes = df[categorical_cols].mode(dropna=True)
+        for col in categorical_cols:
+            mode = modes[col].iloc[0] if len(modes) else None
+            fill_values[col] = "Unknown" if pd.isna(mode) else mode
+
+    return {"columns": columns, "fill_values": fill_values}
+
+
+@instrument()
+def apply_fill_values(df: pd.DataFrame, fitted: dict, inplace=False) -> pd.DataFrame:
+    """
+    Drops the columns not kept at fit time and fills every missing value in a single
+    fillna call, using values from `fit_fill_values` rather than statistics of `df`.
+    """
+    keep = set(fitted["columns"])
+    dropped = [col for col in df.columns if col not in keep]
+    if inplace:
+        df.drop(columns=dropped, inplace=True)
     else:
-        logging.info("No missing values detected.")
+        df = df.drop(columns=dropped)
+
+    values = {col: val for col, val in fitted["fill_values"].items() if col in df.columns}
+    for col, val in values.items():
+        # A fill value unseen in this frame's categories would be rejected by fillna
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and val not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([val])
+    df.fillna(value=values, inplace=True)
+    return df
 
 
+@instrument()
 def handle_missing_values(df: pd.DataFrame, drop_threshold=0.5, fillna_numeric=True) -> pd.DataFrame:
-    logging.info(f"Initial DataFrame shape: {df.shape}")
+    logger.info(f"Initial DataFrame shape: {df.shape}")
     report_missing_values(df)
 
-    # Drop columns with missing percentage > threshold
-    threshold = drop_threshold * len(df)
-    df = df.dropna(axis=1, thresh=threshold)
-    logging.info(f"After dropping columns with >{drop_threshold*100}% missing values: {df.shape}")
-
-    # Fill numeric columns with median
-    if fillna_numeric:
-        for col in df.select_dtypes(include=[np.number]).columns:
-            median = df[col].median()
-            df[col] = df[col].fillna(median)
-
-    # Fill categorical columns with mode or 'Unknown'
-    for col in df.select_dtypes(include=['object', 'category']).columns:
-        mode = df[col].mode().iloc[0] if not df[col].mode().empty else "Unknown"
-        df[col] = df[col].fillna(mode)
+    fitted = fit_fill_values(df, drop_threshold=drop_threshold, fillna_numeric=fillna_numeric)
+    df = apply_fill_values(df, fitted)
+    logger.info(f"After dropping columns with >{drop_threshold*100}% missing values: {df.shape}")
 
     report_missing_values(df)
     return df
 
 
+@instrument()
 def clean_data_types(df: pd.DataFrame, datetime_cols: list = None) -> pd.DataFrame:
     if datetime_cols:
         for col in datetime_cols:
             try:
                 df[col] = pd.to_datetime(df[col], errors='coerce')
-                logging.info(f"Converted column '{col}' to datetime.")
+                logger.info(f"Converted column '{col}' to datetime.")
             except Exception as e:
-                logging.warning(f"Failed to convert '{col}': {e}")
+                logger.warning(f"Failed to convert '{col}': {e}")
     return df
 
 
-def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
-    before = df.shape[0]
-    df = df.drop_duplicates()
-    after = df.shape[0]
-    logging.info(f"Removed {before - after} duplicate rows.")
+def find_duplicate_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Boolean mask of rows that repeat an earlier row. Rows are reduced to a 64-bit
+    hash and duplicates are found with a hash table, without sorting or copying the frame.
+    """
+    return pd.util.hash_pandas_object(df, index=False).duplicated().to_numpy()
+
+
+@instrument()
+def remove_duplicates(df: pd.DataFrame, inplace=False) -> pd.DataFrame:
+    """
+    Drops rows that repeat an earlier row. With `inplace`, `df` is modified only when its
+    index is unique; otherwise a new frame is returned, so always use the return value.
+    """
+    duplicated = find_duplicate_rows(df)
+    # Dropping by label would also remove rows that share a label with a duplicate,
+    # so the in-place path is only taken when labels identify rows
+    if inplace and df.index.is_unique:
+        df.drop(index=df.index[duplicated], inplace=True)
+    else:
+        df = df.take(np.flatnonzero(~duplicated))
+    logger.info(f"Removed {int(duplicated.sum())} duplicate rows.")
     return df
 
 
+@instrument()
+def preprocess(df: pd.DataFrame, datetime_cols: list = None, fill_values: dict = None,
+               drop_threshold=0.5, fillna_numeric=True, drop_duplicates=True, inplace=False):
+    """
+    Runs missing-value handling, datetime conversion and duplicate removal as one stage.
+
+    Without `fill_values` the imputation state is fitted on `df`; pass the returned
+    state (or one loaded with `load_fill_values`) to impute scoring data consistently.
+    Unless `inplace` is set, `df` is copied once and every later step works on that copy.
+    Returns the cleaned frame and the fill values used.
+    """
+    if fill_values is None:
+        fill_values = fit_fill_values(df, drop_threshold=drop_threshold, fillna_numeric=fillna_numeric)
+    df = apply_fill_values(df, fill_values, inplace=inplace)
+    clean_data_types(df, datetime_cols)
+    if drop_duplicates:
+        df = remove_duplicates(df, inplace=True)
+    logger.info(f"Preprocessed DataFrame shape: {df.shape}")
+    return df, fill_values
+
+
+def save_fill_values(fill_values: dict, path="../models/fill_values.pkl"):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(fill_values, path)
+    logger.info(f"Saved fill values to {path}")
+
+
+def load_fill_values(path="../models/fill_values.pkl") -> dict:
+    return joblib.load(path)
+
+
 def save_cleaned_data(df: pd.DataFrame, filename="fraud_data_cleaned.parquet", output_dir="../data/processed/"):
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, filename)
     df.to_parquet(output_path, index=False)
-    logging.info(f"Saved cleaned data to {output_path}")
+    logger.info(f"Saved cleaned data to {output_path}")
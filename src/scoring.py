@@ -0,0 +1,189 @@
+# src/scoring.py
+
+from __future__ import annotations
+
+import copy
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import joblib
+import numpy as np
+
+from src.compiled_forest import CompiledForest
+
+if TYPE_CHECKING:
+    from sklearn.compose import ColumnTransformer
+
+logger = logging.getLogger(__name__)
+
+# The repository's models/ folder, wherever the process is started from
+MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
+
+# Default artifact locations, as written by the modeling notebooks and the pipeline
+ARTIFACTS = {
+    "fraud": {
+        "preprocessor": os.path.join(MODELS_DIR, "preprocessor_fraud.pkl"),
+        "model": os.path.join(MODELS_DIR, "rf_fraud_model.pkl"),
+        "feature_names": os.path.join(MODELS_DIR, "feature_names_fraud.npy"),
+    },
+    "creditcard": {
+        "preprocessor": os.path.join(MODELS_DIR, "preprocessor_creditcard.pkl"),
+        "model": os.path.join(MODELS_DIR, "rf_creditcard_model.pkl"),
+        "feature_names": os.path.join(MODELS_DIR, "feature_names_creditcard.npy"),
+    },
+}
+
+
+class FraudScorer:
+    """
+    Scores raw transactions with a fitted preprocessor and model loaded once.
+
+    The fitted ColumnTransformer from `transformers.get_preprocessor` is compiled into
+    plain arrays: scaler means/scales and, for every one-hot category, its position in
+    the selected feature list. A request then fills a preallocated NumPy matrix with
+    the model's input columns directly, with no DataFrame built per call.
+
+    Forests are also flattened into a `CompiledForest`, which scores batches of up to
+    `compiled_batch_limit` rows; `model` may itself be a CompiledForest loaded from
+    exported arrays.
+    """
+
+    def __init__(self, preprocessor: ColumnTransformer, model, feature_names, compiled_batch_limit=16):
+        from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+
+        self.model = model
+        self.feature_names = [str(name) for name in feature_names]
+        self._compile(preprocessor)
+
+        # Larger forest batches are averaged tree by tree below, skipping the per-call
+        # joblib dispatch and input validation of predict_proba; trees read float32 input
+        self._is_forest = isinstance(model, (RandomForestClassifier, ExtraTreesClassifier))
+        self.compiled = model if isinstance(model, CompiledForest) else None
+        if self._is_forest:
+            self.compiled = CompiledForest.from_sklearn(model)
+        self.compiled_batch_limit = compiled_batch_limit
+        self._dtype = np.float32 if self.compiled is not None else np.float64
+
+        # The model was fitted on a labelled DataFrame; with the column order checked
+        # here, drop the names from a shallow copy so sklearn does not re-validate (and
+        # warn) per call, leaving the caller's estimator untouched
+        model_names = getattr(model, "feature_names_in_", None)
+        if model_names is not None:
+            if list(model_names) != self.feature_names:
+                raise ValueError("Model feature names do not match the selected feature list.")
+            self.model = copy.copy(model)
+            del self.model.feature_names_in_
+
+    @classmethod
+    def from_artifacts(cls, preprocessor_path: str, model_path: str, feature_names_path: str) -> "FraudScorer":
+        """
+        `model_path` is a pickled model or a directory written by `CompiledForest.save`.
+        """
+        preprocessor = joblib.load(preprocessor_path)
+        model = CompiledForest.load(model_path) if os.path.isdir(model_path) else joblib.load(model_path)
+        feature_names = np.load(feature_names_path, allow_pickle=True)
+        logger.info(f"Loaded scoring artifacts: {model_path} with {len(feature_names)} features.")
+        return cls(preprocessor, model, feature_names)
+
+    @classmethod
+    def for_dataset(cls, dataset: str) -> "FraudScorer":
+        paths = ARTIFACTS[dataset]
+        return cls.from_artifacts(paths["preprocessor"], paths["model"], paths["feature_names"])
+
+    def _compile(self, preprocessor: ColumnTransformer) -> None:
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+        position = {name: i for i, name in enumerate(self.feature_names)}
+        self.numeric_cols, self.categorical_cols = [], []
+        num_src, num_dst, mean, scale = [], [], [], []
+        self._category_positions = []
+
+        for name, transformer, cols in preprocessor.transformers_:
+            if transformer == "drop" or len(cols) == 0:
+                continue
+            if isinstance(transformer, StandardScaler):
+                for i, col in enumerate(cols):
+                    dst = position.get(f"{name}__{col}")
+                    if dst is not None:
+                        num_src.append(len(self.numeric_cols) + i)
+                        num_dst.append(dst)
+                        mean.append(transformer.mean_[i] if transformer.mean_ is not None else 0.0)
+                        scale.append(transformer.scale_[i] if transformer.scale_ is not None else 1.0)
+                self.numeric_cols.extend(cols)
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None:
+                    raise ValueError("OneHotEncoder with `drop` is not supported by FraudScorer.")
+                for col, categories in zip(cols, transformer.categories_):
+                    lookup = {}
+                    for category in categories:
+                        dst = position.get(f"{name}__{col}_{category}")
+                        if dst is not None:
+                            lookup[category] = dst
+                    self._category_positions.append(lookup)
+                self.categorical_cols.extend(cols)
+            else:
+                raise ValueError(f"Unsupported transformer '{name}': {type(transformer).__name__}")
+
+        self._num_src = np.asarray(num_src, dtype=np.intp)
+        self._num_dst = np.asarray(num_dst, dtype=np.intp)
+        self._mean = np.asarray(mean, dtype=np.float64)
+        self._scale = np.asarray(scale, dtype=np.float64)
+
+    @property
+    def input_columns(self) -> list:
+        """
+        Raw columns expected by `score`: numeric columns first, then categorical ones.
+        """
+        return self.numeric_cols + self.categorical_cols
+
+    def transform(self, numeric, categorical=None) -> np.ndarray:
+        """
+        Builds the model input matrix from raw numeric values, shape (n, len(numeric_cols)),
+        and raw categorical values, shape (n, len(categorical_cols)). A single
+        transaction may be passed as 1-D arrays.
+        """
+        numeric = np.asarray(numeric, dtype=np.float64)
+        if numeric.ndim == 1:
+            numeric = numeric.reshape(1, -1)
+        X = np.zeros((numeric.shape[0], len(self.feature_names)), dtype=self._dtype)
+        X[:, self._num_dst] = (numeric[:, self._num_src] - self._mean) / self._scale
+
+        if self._category_positions:
+            categorical = np.asarray(categorical, dtype=object)
+            if categorical.ndim == 1:
+                categorical = categorical.reshape(1, -1)
+            for j, lookup in enumerate(self._category_positions):
+                for i, value in enumerate(categorical[:, j]):
+                    # Categories unseen at fit time stay all-zero, like handle_unknown='ignore'
+                    dst = lookup.get(value)
+                    if dst is not None:
+                        X[i, dst] = 1.0
+        return X
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # The per-tree path skips input checks, so X must already be the trees' float32
+        X = np.ascontiguousarray(X, dtype=self._dtype)
+        if self.compiled is not None and (not self._is_forest or len(X) <= self.compiled_batch_limit):
+            return self.compiled.predict_proba(X)
+        if not self._is_forest:
+            return self.model.predict_proba(X)
+        proba = self.model.estimators_[0].predict_proba(X, check_input=False)
+        for tree in self.model.estimators_[1:]:
+            proba += tree.predict_proba(X, check_input=False)
+        return proba / len(self.model.estimators_)
+
+    def score(self, numeric, categorical=None) -> np.ndarray:
+        """
+        Returns the fraud probability for each transaction.
+        """
+        return self.predict_proba(self.transform(numeric, categorical))[:, 1]
+
+    def score_records(self, records: list) -> np.ndarray:
+        """
+        Scores a list of dicts keyed by the raw column names, e.g. parsed JSON.
+        """
+        numeric = [[record[col] for col in self.numeric_cols] for record in records]
+        categorical = [[record[col] for col in self.categorical_cols] for record in records]
+        return self.score(np.asarray(numeric, dtype=np.float64).reshape(len(records), -1), categorical)
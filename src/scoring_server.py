@@ -0,0 +1,127 @@
+# src/scoring_server.py
+#
+# Minimal asyncio HTTP server around FraudScorer. Artifacts are loaded once at
+# startup; each request is scored on the event loop, which keeps single and
+# micro-batch latency to the model's own inference time.
+#
+#     python -m src.scoring_server --dataset fraud --port 8080
+#
+# POST /score   {"records": [{"purchase_value": 34.0, ..., "country": "Japan"}]}
+#           or  {"numeric": [[...]], "categorical": [[...]]}
+#           ->  {"scores": [0.03]}
+# GET  /health  -> {"status": "ok", "input_columns": [...]}
+
+import argparse
+import asyncio
+import json
+import logging
+
+from src.scoring import FraudScorer, ARTIFACTS
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 16 * 2**20
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    headers = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return headers.encode() + body
+
+
+def handle_request(scorer: FraudScorer, method: str, path: str, body: bytes):
+    if method == "GET" and path == "/health":
+        return 200, {"status": "ok", "input_columns": scorer.input_columns}
+    if method != "POST" or path != "/score":
+        return 404, {"error": f"No route for {method} {path}"}
+
+    try:
+        payload = json.loads(body)
+        if "records" in payload:
+            scores = scorer.score_records(payload["records"])
+        else:
+            scores = scorer.score(payload["numeric"], payload.get("categorical"))
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        return 400, {"error": f"Invalid scoring request: {e}"}
+    return 200, {"scores": scores.tolist()}
+
+
+async def _serve_connection(scorer: FraudScorer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {"error": "Request body too large"}, keep_alive=False))
+                await writer.drain()
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            try:
+                status, payload = handle_request(scorer, method, path, body)
+            except Exception as e:
+                logger.warning(f"Scoring failed: {e}")
+                status, payload = 500, {"error": "Scoring failed"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(scorer: FraudScorer, host: str = "127.0.0.1", port: int = 8080, ready=None):
+    """
+    Serves until cancelled. `ready` is any event-like object, set once the socket is bound.
+    """
+    server = await asyncio.start_server(lambda r, w: _serve_connection(scorer, r, w), host, port)
+    logger.info(f"Scoring server listening on {host}:{port}")
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fraud scores over HTTP.")
+    parser.add_argument("--dataset", choices=list(ARTIFACTS), default="fraud")
+    parser.add_argument("--preprocessor", help="overrides the dataset's default preprocessor path")
+    parser.add_argument("--model", help="overrides the dataset's default model path (pickle or compiled forest directory)")
+    parser.add_argument("--features", help="overrides the dataset's default feature names path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    paths = ARTIFACTS[args.dataset]
+    scorer = FraudScorer.from_artifacts(
+        args.preprocessor or paths["preprocessor"],
+        args.model or paths["model"],
+        args.features or paths["feature_names"],
+    )
+    asyncio.run(serve(scorer, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
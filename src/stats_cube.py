@@ -0,0 +1,105 @@
+# src/stats_cube.py
+
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CUBE_DIMENSIONS = ["source", "browser", "sex", "country", "hour_of_day", "day_of_week"]
+
+
+class FraudStatsCube:
+    """
+    Pre-aggregated transaction counts, fraud counts and amount sums at the finest grain
+    of `dimensions`. Any fraud-rate / count / mean-amount breakdown over a subset of the
+    dimensions is a roll-up of this table, which has at most one row per observed
+    combination, instead of a fresh value_counts/crosstab over the raw frame.
+    """
+
+    def __init__(self, dimensions=None, target_col="class", amount_col="purchase_value"):
+        self.dimensions = list(dimensions or CUBE_DIMENSIONS)
+        self.target_col = target_col
+        self.amount_col = amount_col
+        self.table = pd.DataFrame(columns=self.dimensions + ["count", "fraud", "amount_sum"])
+        self._queries = {}
+
+    def _aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        dims = [d for d in self.dimensions if d in df.columns]
+        missing = set(self.dimensions) - set(dims)
+        if missing:
+            raise ValueError(f"Missing cube dimensions in data: {missing}")
+        grouped = df.groupby(dims, observed=True, dropna=False, sort=False)
+        table = pd.DataFrame({
+            "count": grouped.size(),
+            "fraud": grouped[self.target_col].sum(),
+            "amount_sum": grouped[self.amount_col].sum(),
+        }).reset_index()
+        # Plain object/integer dimension columns keep roll-ups independent of batch categories
+        for dim in dims:
+            if isinstance(table[dim].dtype, pd.CategoricalDtype):
+                table[dim] = table[dim].astype(table[dim].cat.categories.dtype)
+        return table
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, dimensions=None, target_col="class", amount_col="purchase_value"):
+        cube = cls(dimensions, target_col, amount_col)
+        cube.table = cube._aggregate(df)
+        logger.info(f"Built stats cube with {len(cube.table)} cells from {len(df)} rows.")
+        return cube
+
+    def update(self, batch: pd.DataFrame) -> "FraudStatsCube":
+        """
+        Folds a new batch into the cube; cost grows with the cube and batch, not the history.
+        """
+        batch_table = self._aggregate(batch)
+        if self.table.empty:
+            self.table = batch_table
+            self._queries.clear()
+            return self
+        combined = pd.concat([self.table, batch_table], ignore_index=True)
+        self.table = combined.groupby(self.dimensions, dropna=False, sort=False)[
+            ["count", "fraud", "amount_sum"]].sum().reset_index()
+        self._queries.clear()
+        return self
+
+    def query(self, by, filters: dict = None) -> pd.DataFrame:
+        """
+        count, fraud_count, fraud_rate and mean_amount grouped by `by` (a dimension or list
+        of dimensions), optionally restricted to rows where each dimension in `filters`
+        equals the given value. Unfiltered results are memoised until the next update;
+        callers always get their own copy, so changing it never alters later queries.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        key = tuple(by) if not filters else None
+        if key is not None and key in self._queries:
+            return self._queries[key].copy()
+
+        table = self.table
+        for dim, value in (filters or {}).items():
+            table = table[table[dim] == value]
+        rolled = table.groupby(by, dropna=False)[["count", "fraud", "amount_sum"]].sum()
+        result = pd.DataFrame({
+            "count": rolled["count"],
+            "fraud_count": rolled["fraud"],
+            "fraud_rate": rolled["fraud"] / rolled["count"],
+            "mean_amount": rolled["amount_sum"] / rolled["count"],
+        })
+        if key is not None:
+            self._queries[key] = result
+            return result.copy()
+        return result
+
+    def save(self, path: str = "../data/processed/fraud_stats_cube.parquet") -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.table.to_parquet(path, index=False)
+        logger.info(f"Saved stats cube to {path}")
+
+    @classmethod
+    def load(cls, path: str = "../data/processed/fraud_stats_cube.parquet", target_col="class",
+             amount_col="purchase_value") -> "FraudStatsCube":
+        table = pd.read_parquet(path)
+        cube = cls([c for c in table.columns if c not in ("count", "fraud", "amount_sum")], target_col, amount_col)
+        cube.table = table
+        return cube
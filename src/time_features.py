@@ -0,0 +1,102 @@
+# src/time_features.py
+
+import numpy as np
+import pandas as pd
+
+from src.frequency_store import KEY_PREFIXES
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday; pandas numbers Monday as 0
+EPOCH_DAY_OF_WEEK = 3
+
+
+def epoch_seconds(values, wall_clock: bool = False) -> tuple:
+    """
+    (int64 epoch seconds, NaT mask) for a datetime column. Datetime columns are viewed
+    as integers without copying the frame; strings are parsed once into the array.
+    Timezone-aware values count UTC seconds, so differences are real durations; with
+    `wall_clock` they count local wall time instead, for calendar fields like the hour.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = values.dt.tz_localize(None) if wall_clock else values.dt.tz_convert(None)
+    ns = np.asarray(values, dtype="datetime64[ns]").view(np.int64)
+    missing = ns == np.iinfo(np.int64).min
+    return np.floor_divide(ns, 1_000_000_000), missing
+
+
+def _with_missing(values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    if not missing.any():
+        return values
+    values = values.astype(np.float64)
+    values[missing] = np.nan
+    return values
+
+
+def seconds_since_previous(keys, times: np.ndarray, missing: np.ndarray = None) -> np.ndarray:
+    """
+    Seconds since the same key's previous purchase (NaN for its first one), from one
+    sort by (key, time) and a diff of the sorted times.
+    """
+    codes = pd.factorize(keys, use_na_sentinel=False)[0]
+    order = np.lexsort((times, codes))
+    sorted_times = times[order]
+    sorted_codes = codes[order]
+
+    deltas = np.full(len(times), np.nan)
+    if len(times) > 1:
+        same_key = sorted_codes[1:] == sorted_codes[:-1]
+        if missing is not None:
+            same_key &= ~missing[order][1:] & ~missing[order][:-1]
+        gaps = np.full(len(times) - 1, np.nan)
+        gaps[same_key] = sorted_times[1:][same_key] - sorted_times[:-1][same_key]
+        deltas[order[1:]] = gaps
+    return deltas
+
+
+def compute_time_features(df: pd.DataFrame, signup_col="signup_time", purchase_col="purchase_time",
+                          velocity_keys=("user_id", "device_id")) -> dict:
+    """
+    All temporal features from the int64 epoch arrays of the two datetime columns:
+    time_since_signup (hours), hour_of_day, day_of_week and, per key in `velocity_keys`
+    present in `df`, <prefix>_secs_since_prev. Returns {column: array}; nothing is
+    copied from or written to `df`.
+    """
+    purchase_times = df[purchase_col]
+    if not pd.api.types.is_datetime64_any_dtype(purchase_times):
+        purchase_times = pd.to_datetime(purchase_times)
+    purchase, purchase_missing = epoch_seconds(purchase_times)
+    signup, signup_missing = epoch_seconds(df[signup_col])
+    # Hour and weekday follow local wall time, as .dt.hour does; durations stay in UTC
+    local = purchase
+    if isinstance(purchase_times.dtype, pd.DatetimeTZDtype):
+        local = epoch_seconds(purchase_times, wall_clock=True)[0]
+
+    days = np.floor_divide(local, SECONDS_PER_DAY)
+    features = {
+        "time_since_signup": _with_missing((purchase - signup) / SECONDS_PER_HOUR,
+                                           purchase_missing | signup_missing),
+        "hour_of_day": _with_missing((np.floor_divide(local, SECONDS_PER_HOUR) % 24).astype(np.int32),
+                                     purchase_missing),
+        "day_of_week": _with_missing(((days + EPOCH_DAY_OF_WEEK) % 7).astype(np.int32), purchase_missing),
+    }
+    for key in velocity_keys:
+        if key in df.columns:
+            prefix = KEY_PREFIXES.get(key, key)
+            features[f"{prefix}_secs_since_prev"] = seconds_since_previous(df[key].to_numpy(), purchase,
+                                                                           purchase_missing)
+    return features
+
+
+def add_temporal_features(df: pd.DataFrame, columns=None, velocity_keys=("user_id", "device_id")) -> pd.DataFrame:
+    """
+    Adds the temporal features to `df` in place (all of them, or only `columns`) and
+    returns it.
+    """
+    features = compute_time_features(df, velocity_keys=velocity_keys)
+    for name, values in features.items():
+        if columns is None or name in columns:
+            df[name] = values
+    return df
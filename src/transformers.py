@@ -1,31 +1,38 @@
 import pandas as pd
+import numpy as np
 import logging
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from imblearn.pipeline import Pipeline as ImbPipeline
-from imblearn.over_sampling import SMOTE
-from imblearn.under_sampling import RandomUnderSampler
 
-logging.basicConfig(level=logging.INFO)
+from src.instrumentation import instrument
 
+logger = logging.getLogger(__name__)
+
+
+def get_preprocessor(numeric_cols, categorical_cols, encoder_type='onehot', sparse=False):
+    """
+    With `sparse=True` the one-hot block stays a float32 sparse matrix and the
+    ColumnTransformer always returns CSR output, for `fit_transform_sparse`.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import StandardScaler, OneHotEncoder
 
-def get_preprocessor(numeric_cols, categorical_cols, encoder_type='onehot'):
     transformers = []
     if numeric_cols:
         transformers.append(("num", StandardScaler(), numeric_cols))
     if categorical_cols:
         if encoder_type == 'onehot':
-            transformers.append(
-                ("cat", OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_cols)
-            )
+            encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=True, dtype=np.float32) if sparse \
+                else OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+            transformers.append(("cat", encoder, categorical_cols))
         else:
             raise ValueError("Only 'onehot' encoding is supported.")
     if not transformers:
         raise ValueError("No columns provided for preprocessing.")
+    if sparse:
+        return ColumnTransformer(transformers, sparse_threshold=1.0)
     return ColumnTransformer(transformers)
 
 
+@instrument()
 def fit_transform_to_df(preprocessor, X: pd.DataFrame, drop_constant=True):
     X_trans = preprocessor.fit_transform(X)
     feature_names = preprocessor.get_feature_names_out()
@@ -34,10 +41,11 @@ def fit_transform_to_df(preprocessor, X: pd.DataFrame, drop_constant=True):
     if drop_constant:
         dropped_cols = X_trans_df.columns[(X_trans_df.nunique() <= 1) | (X_trans_df.isna().all())]
         X_trans_df = X_trans_df.drop(columns=dropped_cols)
-        logging.info(f"Dropped {len(dropped_cols)} constant/NaN columns: {list(dropped_cols)}")
+        logger.info(f"Dropped {len(dropped_cols)} constant/NaN columns: {list(dropped_cols)}")
     return X_trans_df
 
 
+@instrument()
 def transform_to_df(preprocessor, X: pd.DataFrame, selected_features=None):
     X_trans = preprocessor.transform(X)
     feature_names = preprocessor.get_feature_names_out()
@@ -51,16 +59,164 @@ def transform_to_df(preprocessor, X: pd.DataFrame, selected_features=None):
     return X_trans_df
 
 
+def _as_float32_csr(X):
+    import scipy.sparse as sp
+
+    X = sp.csr_matrix(X) if not sp.issparse(X) else X.tocsr()
+    return X.astype(np.float32, copy=False)
+
+
+def _sparse_nbytes(X):
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def constant_columns_sparse(X):
+    """
+    Indices of columns with at most one distinct non-NaN value, computed from the
+    sparse structure (implicit zeros included) without densifying.
+    """
+    X = X.tocsc()
+    col_max = np.asarray(X.nanmax(axis=0).todense()).ravel()
+    col_min = np.asarray(X.nanmin(axis=0).todense()).ravel()
+    all_nan = np.isnan(col_max) & np.isnan(col_min)
+    return np.flatnonzero((col_max == col_min) | all_nan)
+
+
+@instrument()
+def fit_transform_sparse(preprocessor, X: pd.DataFrame, drop_constant=True):
+    """
+    Sparse counterpart of `fit_transform_to_df` for a preprocessor built with
+    `sparse=True`. Returns a float32 CSR matrix and its feature names, in the
+    ColumnTransformer's output order. Scikit-learn models and SMOTE accept the
+    matrix directly, so it never has to be densified.
+    """
+    X_trans = _as_float32_csr(preprocessor.fit_transform(X))
+    feature_names = np.asarray(preprocessor.get_feature_names_out())
+
+    if drop_constant:
+        dropped = constant_columns_sparse(X_trans)
+        keep = np.setdiff1d(np.arange(X_trans.shape[1]), dropped)
+        X_trans = X_trans[:, keep]
+        logger.info(f"Dropped {len(dropped)} constant/NaN columns: {list(feature_names[dropped])}")
+        feature_names = feature_names[keep]
+
+    dense_bytes = X_trans.shape[0] * X_trans.shape[1] * np.dtype(np.float64).itemsize
+    logger.info(f"Sparse float32 matrix {X_trans.shape}: {_sparse_nbytes(X_trans) / 2**20:.1f} MB "
+                f"vs {dense_bytes / 2**20:.1f} MB dense float64 "
+                f"({dense_bytes / max(_sparse_nbytes(X_trans), 1):.1f}x smaller).")
+    return X_trans, list(feature_names)
+
+
+@instrument()
+def transform_sparse(preprocessor, X: pd.DataFrame, selected_features):
+    """
+    Transforms new data into a float32 CSR matrix with the columns of `selected_features`,
+    in that order.
+    """
+    X_trans = _as_float32_csr(preprocessor.transform(X))
+    position = {name: i for i, name in enumerate(preprocessor.get_feature_names_out())}
+    missing = set(selected_features) - set(position)
+    if missing:
+        raise ValueError(f"Missing columns in transformed data: {missing}")
+    return X_trans[:, [position[name] for name in selected_features]]
+
+
+def balanced_sample_weights(y):
+    """
+    Per-sample weights that give every class the same total weight, equivalent to
+    class_weight='balanced'. Pass them as `sample_weight` when fitting to balance
+    classes without materialising any resampled copy of X.
+    """
+    y = np.asarray(y)
+    classes, inverse, counts = np.unique(y, return_inverse=True, return_counts=True)
+    return (len(y) / (len(classes) * counts))[inverse]
+
+
+def _smote_targets(y, sampling_strategy):
+    # Number of synthetic samples per minority class, following imblearn's conventions
+    classes, counts = np.unique(y, return_counts=True)
+    majority = counts.max()
+    if sampling_strategy == "auto":
+        return {c: majority - n for c, n in zip(classes, counts) if n < majority}
+    if isinstance(sampling_strategy, float) and len(classes) == 2:
+        minority = classes[counts.argmin()]
+        return {minority: max(int(sampling_strategy * majority) - counts.min(), 0)}
+    raise ValueError("partitioned_smote supports sampling_strategy='auto' or a float for binary targets.")
+
+
+def iter_partitioned_smote(X, y, sampling_strategy="auto", k_neighbors=5, partition_size=10_000,
+                           chunk_size=100_000, random_state=42):
+    """
+    Yields (X_chunk, y_chunk) batches of SMOTE samples without building the oversampled set.
+
+    Each minority class is split into partitions of about `partition_size` rows with
+    MiniBatchKMeans and neighbours are searched inside a partition only, so the index
+    cost grows with the partition rather than the class. Synthetic rows are interpolated
+    between a sample and one of its k nearest neighbours, as in SMOTE, and emitted as
+    float32 chunks of at most `chunk_size` rows.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.neighbors import NearestNeighbors
+
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    rng = np.random.default_rng(random_state)
+
+    for label, n_new in _smote_targets(y, sampling_strategy).items():
+        X_class = X[y == label]
+        n_parts = max(1, int(np.ceil(len(X_class) / partition_size)))
+        if n_parts == 1:
+            parts = [X_class]
+        else:
+            assignment = MiniBatchKMeans(n_clusters=n_parts, random_state=random_state, n_init=3).fit_predict(X_class)
+            parts = [X_class[assignment == p] for p in range(n_parts)]
+        parts = [part for part in parts if len(part) > 1]
+        if not parts or n_new <= 0:
+            continue
+
+        # Synthetic samples are shared out in proportion to partition size
+        sizes = np.array([len(part) for part in parts])
+        quotas = rng.multinomial(n_new, sizes / sizes.sum())
+        for part, quota in zip(parts, quotas):
+            k = min(k_neighbors, len(part) - 1)
+            neighbours = NearestNeighbors(n_neighbors=k + 1).fit(part).kneighbors(part, return_distance=False)
+            for start in range(0, quota, chunk_size):
+                n = min(chunk_size, quota - start)
+                base = rng.integers(0, len(part), n)
+                other = neighbours[base, rng.integers(1, k + 1, n)]
+                gap = rng.random((n, 1), dtype=np.float32)
+                yield part[base] + gap * (part[other] - part[base]), np.full(n, label, dtype=y.dtype)
+
+
+@instrument()
 def apply_balancing(X, y, strategy="smote", sampling_strategy="auto"):
-    logging.info(f"Original class distribution: {y.value_counts().to_dict()}")
+    """
+    Resamples X, y. 'partitioned_smote' builds the same kind of synthetic samples as
+    'smote' from `iter_partitioned_smote` and returns float32 data; for very large
+    sets, iterate that generator or fit with `balanced_sample_weights` instead.
+    """
+    logger.info(f"Original class distribution: {pd.Series(y).value_counts().to_dict()}")
+    if strategy == "partitioned_smote":
+        batches = list(iter_partitioned_smote(X, y, sampling_strategy=sampling_strategy))
+        X_res = np.vstack([np.asarray(X, dtype=np.float32)] + [b[0] for b in batches])
+        y_res = np.concatenate([np.asarray(y)] + [b[1] for b in batches])
+        if isinstance(X, pd.DataFrame):
+            X_res = pd.DataFrame(X_res, columns=X.columns)
+        if isinstance(y, pd.Series):
+            y_res = pd.Series(y_res, name=y.name)
+        logger.info(f"Balanced class distribution: {pd.Series(y_res).value_counts().to_dict()}")
+        return X_res, y_res
+    from imblearn.over_sampling import SMOTE
+    from imblearn.under_sampling import RandomUnderSampler
+
     if strategy == "smote":
         balancer = SMOTE(random_state=42, sampling_strategy=sampling_strategy)
     elif strategy == "undersample":
         balancer = RandomUnderSampler(random_state=42, sampling_strategy=sampling_strategy)
     else:
-        raise ValueError("Strategy must be 'smote' or 'undersample'")
+        raise ValueError("Strategy must be 'smote', 'partitioned_smote' or 'undersample'")
     X_res, y_res = balancer.fit_resample(X, y)
-    logging.info(f"Balanced class distribution: {pd.Series(y_res).value_counts().to_dict()}")
+    logger.info(f"Balanced class distribution: {pd.Series(y_res).value_counts().to_dict()}")
     return X_res, y_res
 
 
@@ -69,6 +225,10 @@ def get_full_pipeline(numeric_cols, categorical_cols, balance_strategy="smote",
     if balance_strategy:
         if balance_strategy not in ["smote", "undersample"]:
             raise ValueError("Invalid balancing strategy.")
+        from imblearn.pipeline import Pipeline as ImbPipeline
+        from imblearn.over_sampling import SMOTE
+        from imblearn.under_sampling import RandomUnderSampler
+
         balancer = SMOTE(random_state=42, sampling_strategy=sampling_strategy) \
             if balance_strategy == "smote" else \
             RandomUnderSampler(random_state=42, sampling_strategy=sampling_strategy)
@@ -77,6 +237,8 @@ def get_full_pipeline(numeric_cols, categorical_cols, balance_strategy="smote",
             ("balancer", balancer)
         ])
     else:
+        from sklearn.pipeline import Pipeline
+
         pipeline = Pipeline(steps=[
             ("preprocessor", preprocessor)
         ])
@@ -0,0 +1,24 @@
+# src/utils.py
+
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so modules that
+    only need a heavy dependency (matplotlib, seaborn, ...) inside functions do not
+    pay for it at import time.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from src.eda import binned_histogram_kde, render_eda_report
+
+
+def test_kde_matches_grid_for_binary_column():
+    values = np.array([0.0, 1.0] * 25)
+    payload = binned_histogram_kde(values, grid_size=512)
+    assert len(payload["kde_x"]) == len(payload["kde_y"]) == 512
+
+
+def test_kde_matches_grid_for_tiny_column():
+    payload = binned_histogram_kde(np.random.default_rng(0).normal(size=5), grid_size=64)
+    assert len(payload["kde_x"]) == len(payload["kde_y"]) == 64
+
+
+def test_render_eda_report_small_frame(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "amount": rng.normal(size=50),
+        "flag": rng.integers(0, 2, 50),
+        "source": rng.choice(["Ads", "SEO"], 50),
+        "class": rng.integers(0, 2, 50),
+    })
+    render_eda_report(df, ["amount", "flag"], ["source"], output_dir=str(tmp_path), n_jobs=1)
+    assert (tmp_path / "univariant" / "flag_distribution.png").exists()
@@ -0,0 +1,38 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.frequency_store import TransactionCountStore
+
+
+def _brute_force_24h(df, key):
+    counts = []
+    for _, row in df.iterrows():
+        if pd.isna(row["purchase_time"]):
+            counts.append(np.nan)
+            continue
+        same = df[(df[key] == row[key]) & df["purchase_time"].notna()]
+        delta = row["purchase_time"] - same["purchase_time"]
+        counts.append(int(((delta >= pd.Timedelta(0)) & (delta < pd.Timedelta(hours=24))).sum()))
+    return np.array(counts, dtype=np.float64)
+
+
+def test_window_counts_with_missing_time():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({
+        "user_id": rng.integers(0, 20, n),
+        "device_id": rng.integers(0, 10, n),
+        "purchase_time": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 5 * 86400, n), unit="s"),
+    })
+    df.loc[7, "purchase_time"] = pd.NaT
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        features = TransactionCountStore().update(df)
+
+    assert np.isnan(features.loc[7, "user_transaction_count_24h"])
+    np.testing.assert_array_equal(features["user_transaction_count_24h"], _brute_force_24h(df, "user_id"))
+    np.testing.assert_array_equal(features["device_transaction_count_24h"], _brute_force_24h(df, "device_id"))
+    assert features["user_transaction_count"].sum() == df.groupby("user_id").size().pow(2).sum()
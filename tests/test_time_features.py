@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+from src.time_features import compute_time_features
+
+
+def test_calendar_fields_use_local_wall_time():
+    purchase = pd.Series(pd.to_datetime(["2015-03-01 23:30", "2015-07-04 00:15", None])).dt.tz_localize("US/Eastern")
+    signup = purchase - pd.Timedelta(hours=5)
+    df = pd.DataFrame({"signup_time": signup, "purchase_time": purchase, "user_id": [1, 1, 2]})
+
+    features = compute_time_features(df)
+
+    np.testing.assert_array_equal(features["hour_of_day"], df["purchase_time"].dt.hour)
+    np.testing.assert_array_equal(features["day_of_week"], df["purchase_time"].dt.dayofweek)
+    np.testing.assert_array_equal(features["time_since_signup"], [5.0, 5.0, np.nan])